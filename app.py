@@ -2,6 +2,16 @@ from flask import Flask,jsonify
 from config import Config
 from utils.schema.models import db
 from utils.routes import auth_bp
+from utils.api.authentication.commands import tokens_cli
+from utils.commands import timesheets_cli, billing_cli, tenants_cli
+from utils import instrumentation, tenancy
+from utils.db_pool import engine_options
+from utils.sql import check_database_uri
+from utils.replicas import replica_router
+from utils.http_cache import response_cache
+from utils.api.authentication.hashing_pool import HashingPoolSaturated, saturated_response
+from utils.api.authentication.keys import key_manager
+from utils.api.authentication.auth_helper import check_if_token_revoked, validate_revocation_config
 from flask_jwt_extended import  JWTManager
 from flask_migrate import Migrate
 from flask_cors import CORS
@@ -15,6 +25,8 @@ def create_app():
     app.config.from_object(Config)
 
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI')
+    check_database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
     app.config['JWT_ALGORITHM'] = app.config['JWT_ALGORITHM']
     app.config['JWT_PRIVATE_KEY'] = app.config['JWT_PRIVATE_KEY']
     app.config['JWT_PUBLIC_KEY'] = app.config['JWT_PUBLIC_KEY']
@@ -22,63 +34,77 @@ def create_app():
     app.config['JWT_HEADER_TYPE'] = 'Bearer'
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 900  
     app.config['JWT_REFRESH_TOKEN_EXPIRES'] = 3600
+    validate_revocation_config(app.config)
     
+    replica_router.init_app(app)
     db.init_app(app)
+    instrumentation.init_app(app)
+    tenancy.init_app(app)
+    response_cache.init_app(app)
     migrate = Migrate(app, db)
     jwt = JWTManager(app)
+    key_manager.init_app(app, jwt)
+    jwt.token_in_blocklist_loader(check_if_token_revoked)
     app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(timesheets_cli)
+    app.cli.add_command(billing_cli)
+    app.cli.add_command(tenants_cli)
+    app.register_error_handler(HashingPoolSaturated, saturated_response)
+
+    CORS(app, resources={
+        r"/*" : {
+        "origins":
+            "*"
+            }
+        }
+    )
 
-    with app.app_context():
-        db.create_all()
-
-    return app
-
-
-
-
-app = create_app()
-
+    @app.route('/')
+    def hello_world():
+        return jsonify(message="Hello World"), 200
 
-CORS(app, resources={
-    r"/*" : {
-    "origins":
-        "*"
-        }
-    }
-)
+    from utils.api.authentication.auth_helper import auth_helper
+    app.register_blueprint(auth_helper)
 
+    from utils.api.company import company_bp
+    app.register_blueprint(company_bp)
 
-@app.route('/')
-def hello_world():
-    return jsonify(message="Hello World"), 200
+    from utils.api.client import client_bp
+    app.register_blueprint(client_bp)
 
+    from utils.api.projects import project_bp
+    app.register_blueprint(project_bp)
 
+    from utils.api.tasks import task_bp
+    app.register_blueprint(task_bp)
 
-from utils.api.authentication.auth_helper import auth_helper
-app.register_blueprint(auth_helper)
+    from utils.api.timesheets import timesheet_bp
+    app.register_blueprint(timesheet_bp)
 
+    from utils.api.users import user_bp
+    app.register_blueprint(user_bp)
 
-from utils.api.company import company_bp
-app.register_blueprint(company_bp)
+    from utils.api.auth import login_bp
+    app.register_blueprint(login_bp)
 
-from utils.api.client import client_bp
-app.register_blueprint(client_bp)
+    from utils.api.reports import reports_bp
+    app.register_blueprint(reports_bp)
 
-from utils.api.projects import project_bp
-app.register_blueprint(project_bp)
+    from utils.db_pool import db_pool_bp
+    app.register_blueprint(db_pool_bp)
 
-from utils.api.tasks import task_bp
-app.register_blueprint(task_bp)
+    from utils.http_cache import http_cache_bp
+    app.register_blueprint(http_cache_bp)
 
+    with app.app_context():
+        # Replica binds are read-only copies of the primary.
+        db.create_all(bind_key=None)
 
-from utils.api.timesheets import timesheet_bp
-app.register_blueprint(timesheet_bp)
+    return app
 
-from utils.api.users import user_bp
-app.register_blueprint(user_bp)
 
-from utils.api.auth import login_bp
-app.register_blueprint(login_bp)
+app = create_app()
 
 
 if __name__ == '__main__':
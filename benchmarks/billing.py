@@ -0,0 +1,177 @@
+"""Time the billing run against a per-row Python loop.
+
+Seeds ``--entries`` approved time entries (10M by default) spread over
+``--clients`` clients into the database named by SQLALCHEMY_DATABASE_URI
+(once; reruns reuse the data). On PostgreSQL the entries are generated
+server-side with generate_series; other databases get batched inserts,
+which is only practical for much smaller ``--entries``.
+
+    python benchmarks/billing.py --entries 10000000 --workers 8
+"""
+import argparse
+import datetime as dt
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select, func, text  # noqa: E402
+from app import app  # noqa: E402
+from utils.schema.models import (  # noqa: E402
+    db, Company, Client, Project, Task, User, UserRole, Timesheet, TimesheetEntry,
+    TimesheetStatus, ProjectStatus
+)
+from utils.billing import billing_line_items, run_billing  # noqa: E402
+
+BENCH_DOMAIN = 'bench-billing.example'
+FIRST_WEEK = dt.date(2024, 1, 1)
+DATE_FROM = dt.date(2024, 1, 1)
+DATE_TO = dt.date(2024, 12, 31)
+
+
+def seed(entries, clients, users, weeks, tasks_per_project):
+    company = Company.query.filter_by(email_domain=BENCH_DOMAIN).first()
+    if company is not None:
+        return company
+    company = Company(name='Bench', email_domain=BENCH_DOMAIN,
+                      contact_email=f'owner@{BENCH_DOMAIN}', password='$2b$12$' + 'x' * 53)
+    db.session.add(company)
+    db.session.flush()
+
+    client_rows = [{'company_id': company.id, 'name': f'Client {i}', 'code': f'BC{i}'} for i in range(clients)]
+    db.session.execute(insert(Client), client_rows)
+    client_ids = list(db.session.execute(
+        select(Client.id).where(Client.company_id == company.id).order_by(Client.id)).scalars())
+    db.session.execute(insert(Project), [{
+        'client_id': client_id, 'name': f'Project {client_id}', 'code': f'BP{client_id}',
+        'start_date': DATE_FROM, 'end_date': DATE_TO, 'employee_rate': 50 + client_id % 100,
+        'status': ProjectStatus.ACTIVE, 'default_billable': True
+    } for client_id in client_ids])
+    project_ids = list(db.session.execute(
+        select(Project.id).where(Project.client_id.in_(client_ids)).order_by(Project.id)).scalars())
+    db.session.execute(insert(Task), [{
+        'project_id': project_id, 'name': f'Task {i}', 'code': f'BT{project_id}-{i}',
+        'start_date': DATE_FROM, 'end_date': DATE_TO, 'billable': i % 4 != 0
+    } for project_id in project_ids for i in range(tasks_per_project)])
+    task_ids = list(db.session.execute(
+        select(Task.id).where(Task.project_id.in_(project_ids)).order_by(Task.id)).scalars())
+
+    db.session.execute(insert(User), [{
+        'company_id': company.id, 'first_name': 'Bench', 'last_name': str(i),
+        'email': f'user{i}@{BENCH_DOMAIN}', 'password': '$2b$12$' + 'x' * 53, 'role': UserRole.EMPLOYEE
+    } for i in range(users)])
+    user_ids = list(db.session.execute(
+        select(User.id).where(User.company_id == company.id).order_by(User.id)).scalars())
+    sheets = [{
+        'user_id': user_id, 'week_start': FIRST_WEEK + dt.timedelta(weeks=week),
+        'status': TimesheetStatus.APPROVED
+    } for user_id in user_ids for week in range(weeks)]
+    for start in range(0, len(sheets), 10000):
+        db.session.execute(insert(Timesheet), sheets[start:start + 10000])
+    db.session.commit()
+
+    # Each sheet logs ``per_day`` different tasks on each of its 7 days.
+    per_day = min(len(task_ids), math.ceil(entries / (len(sheets) * 7)))
+    first_task, task_count = task_ids[0], len(task_ids)
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text("""
+            INSERT INTO timesheet_entries (timesheet_id, task_id, work_date, minutes, created_at, updated_at)
+            SELECT t.id, :first_task + (t.user_id * 7 + j) % :task_count, t.week_start + d,
+                   15 + (t.id + j + d) % 120, now(), now()
+            FROM timesheets t
+            JOIN users1 u ON u.id = t.user_id AND u.company_id = :company_id
+            CROSS JOIN generate_series(0, 6) AS d
+            CROSS JOIN generate_series(0, :per_day - 1) AS j
+        """), {'first_task': first_task, 'task_count': task_count, 'company_id': company.id, 'per_day': per_day})
+    else:
+        sheet_rows = db.session.execute(
+            select(Timesheet.id, Timesheet.user_id, Timesheet.week_start)
+            .join(User, User.id == Timesheet.user_id).where(User.company_id == company.id)
+        ).all()
+        now = dt.datetime.utcnow()
+        batch = []
+        for sheet in sheet_rows:
+            for d in range(7):
+                for j in range(per_day):
+                    batch.append({
+                        'timesheet_id': sheet.id, 'task_id': first_task + (sheet.user_id * 7 + j) % task_count,
+                        'work_date': sheet.week_start + dt.timedelta(days=d),
+                        'minutes': 15 + (sheet.id + j + d) % 120, 'created_at': now, 'updated_at': now
+                    })
+            if len(batch) >= 20000:
+                db.session.execute(insert(TimesheetEntry), batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(TimesheetEntry), batch)
+    db.session.commit()
+    return company
+
+
+def per_row_loop(client_id):
+    """The straightforward version: load every entry and add it up in Python."""
+    totals = {}
+    entries = (
+        TimesheetEntry.query
+        .join(Timesheet, Timesheet.id == TimesheetEntry.timesheet_id)
+        .join(Task, Task.id == TimesheetEntry.task_id)
+        .join(Project, Project.id == Task.project_id)
+        .filter(Project.client_id == client_id, Timesheet.status == TimesheetStatus.APPROVED,
+                TimesheetEntry.work_date.between(DATE_FROM, DATE_TO))
+        .all()
+    )
+    for entry in entries:
+        task = Task.query.get(entry.task_id)
+        project = Project.query.get(task.project_id)
+        if not (task.billable and project.default_billable is not False):
+            continue
+        user_id = Timesheet.query.get(entry.timesheet_id).user_id
+        key = (project.id, task.id, user_id)
+        minutes, amount = totals.get(key, (0, 0.0))
+        totals[key] = (minutes + entry.minutes, amount + entry.minutes * project.employee_rate / 60)
+    return totals
+
+
+def timed(name, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f'{name:<34} {time.perf_counter() - started:9.3f} s')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=10_000_000)
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--weeks', type=int, default=52)
+    parser.add_argument('--tasks-per-project', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--skip-loop', action='store_true', help='Skip the per-row Python loop.')
+    options = parser.parse_args()
+
+    with app.app_context():
+        company = timed('seed', lambda: seed(options.entries, options.clients, options.users,
+                                             options.weeks, options.tasks_per_project))
+        client_ids = list(db.session.execute(
+            select(Client.id).where(Client.company_id == company.id).order_by(Client.id)).scalars())
+        total = db.session.execute(select(func.count(TimesheetEntry.id))).scalar()
+        print(f'{total} entries, {len(client_ids)} clients')
+
+        client_id = client_ids[0]
+        if not options.skip_loop:
+            timed(f'per-row loop, client {client_id}', lambda: per_row_loop(client_id))
+        timed(f'aggregation, client {client_id}', lambda: list(
+            billing_line_items(db.session.connection(), client_id, DATE_FROM, DATE_TO)))
+        db.session.rollback()
+
+        database_uri = db.engine.url.render_as_string(hide_password=False)
+        timed('all clients, 1 worker', lambda: list(
+            run_billing(database_uri, client_ids, DATE_FROM, DATE_TO, workers=1)))
+        timed(f'all clients, {options.workers} workers', lambda: list(
+            run_billing(database_uri, client_ids, DATE_FROM, DATE_TO, workers=options.workers)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Compare the ORM login lookups with the single-query projections.
+
+Seeds a company with ``--users`` users into the database named by
+SQLALCHEMY_DATABASE_URI (once; reruns reuse the data), then times the
+lookups only - password verification costs the same on both paths and is
+left out.
+
+    python benchmarks/login_lookup.py --users 50000 --iterations 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert  # noqa: E402
+from app import app  # noqa: E402
+from utils.schema.models import db, Company, User, UserRole  # noqa: E402
+from utils.controllers import find_login_user, find_company_login  # noqa: E402
+
+BENCH_DOMAIN = 'bench-login.example'
+
+
+def seed(users):
+    company = Company.query.filter_by(email_domain=BENCH_DOMAIN).first()
+    if company is None:
+        company = Company(name='Bench', email_domain=BENCH_DOMAIN,
+                          contact_email=f'owner@{BENCH_DOMAIN}', password='$2b$12$' + 'x' * 53)
+        db.session.add(company)
+        db.session.commit()
+    existing = User.query.filter_by(company_id=company.id).count()
+    rows = [{
+        'company_id': company.id,
+        'first_name': 'Bench',
+        'last_name': str(i),
+        'email': f'user{i}@{BENCH_DOMAIN}',
+        'password': '$2b$12$' + 'x' * 53,
+        'role': UserRole.EMPLOYEE,
+    } for i in range(existing, users)]
+    for start in range(0, len(rows), 5000):
+        db.session.execute(insert(User), rows[start:start + 5000])
+    db.session.commit()
+    return company
+
+
+def legacy_user_login(email):
+    user = User.query.filter_by(email=email).first()
+    return user.password if user else None
+
+
+def legacy_company_login(contact_email):
+    company = Company.query.filter_by(contact_email=contact_email).first()
+    user = User.query.filter_by(company_id=company.id).first()
+    return company.password, user.role
+
+
+def optimized_user_login(email):
+    row = find_login_user(email)
+    return row.password if row else None
+
+
+def optimized_company_login(contact_email):
+    row = find_company_login(contact_email)
+    return row.password, row.role
+
+
+def measure(name, fn, args, statements):
+    timings = []
+    before = statements[0]
+    for arg in args:
+        started = time.perf_counter()
+        fn(arg)
+        timings.append((time.perf_counter() - started) * 1000)
+        # A fresh identity map per login, as in a real request.
+        db.session.remove()
+    timings.sort()
+    print(f'{name:<26} mean {statistics.mean(timings):7.3f} ms  '
+          f'p50 {timings[len(timings) // 2]:7.3f} ms  '
+          f'p99 {timings[int(len(timings) * 0.99) - 1]:7.3f} ms  '
+          f'queries/call {(statements[0] - before) / len(args):.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--iterations', type=int, default=1000)
+    options = parser.parse_args()
+
+    with app.app_context():
+        company = seed(options.users)
+        statements = [0]
+
+        def count(*_):
+            statements[0] += 1
+        event.listen(db.engine, 'before_cursor_execute', count)
+
+        emails = [f'user{random.randrange(options.users)}@{BENCH_DOMAIN}' for _ in range(options.iterations)]
+        contacts = [company.contact_email] * options.iterations
+        measure('legacy user lookup', legacy_user_login, emails, statements)
+        measure('optimized user lookup', optimized_user_login, emails, statements)
+        measure('legacy company lookup', legacy_company_login, contacts, statements)
+        measure('optimized company lookup', optimized_company_login, contacts, statements)
+
+
+if __name__ == '__main__':
+    main()
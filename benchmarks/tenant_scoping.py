@@ -0,0 +1,145 @@
+"""Show tenant-scoped query plans and timings across 1,000 tenants.
+
+Seeds ``--tenants`` companies, each with its own clients, projects,
+tasks, users and timesheets, into the database named by
+SQLALCHEMY_DATABASE_URI (once; reruns reuse the data). Then, for the
+queries the tenant layer scopes, prints the plan and the median time for
+random tenants, first with the tenant indexes and then with them
+dropped. The indexes are recreated afterwards.
+
+    python benchmarks/tenant_scoping.py --tenants 1000 --samples 200
+"""
+import argparse
+import datetime as dt
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select, text  # noqa: E402
+from app import app  # noqa: E402
+from utils.schema.models import (  # noqa: E402
+    db, Company, Client, Project, Task, User, UserRole, Timesheet, TimesheetStatus, ProjectStatus
+)
+from utils.tenancy import tenant_scope, _tenant_criteria  # noqa: E402
+
+BENCH_DOMAIN = 'bench-tenant-{}.example'
+TENANT_INDEXES = ('ix_clients1_company_id', 'ix_projects_client_id', 'ix_tasks_project_id')
+START = dt.date(2024, 1, 1)
+
+
+def seed(tenants, clients, projects, tasks, users, weeks):
+    existing = db.session.execute(
+        select(Company.id).where(Company.email_domain.like('bench-tenant-%')).order_by(Company.id)
+    ).scalars().all()
+    if existing:
+        return existing
+
+    db.session.execute(insert(Company), [{
+        'name': f'Tenant {i}', 'email_domain': BENCH_DOMAIN.format(i),
+        'contact_email': f'owner@{BENCH_DOMAIN.format(i)}', 'password': '$2b$12$' + 'x' * 53
+    } for i in range(tenants)])
+    company_ids = db.session.execute(
+        select(Company.id).where(Company.email_domain.like('bench-tenant-%')).order_by(Company.id)
+    ).scalars().all()
+
+    db.session.execute(insert(Client), [{
+        'company_id': company_id, 'name': f'Client {company_id}-{i}', 'code': f'TC{company_id}-{i}'
+    } for company_id in company_ids for i in range(clients)])
+    client_ids = db.session.execute(
+        select(Client.id).where(Client.company_id.in_(company_ids))).scalars().all()
+    db.session.execute(insert(Project), [{
+        'client_id': client_id, 'name': f'Project {client_id}-{i}', 'code': f'TP{client_id}-{i}',
+        'start_date': START, 'end_date': START + dt.timedelta(days=365), 'employee_rate': 100,
+        'status': ProjectStatus.ACTIVE
+    } for client_id in client_ids for i in range(projects)])
+    project_ids = db.session.execute(
+        select(Project.id).where(Project.client_id.in_(client_ids))).scalars().all()
+    rows = [{
+        'project_id': project_id, 'name': f'Task {i}', 'code': f'TT{project_id}-{i}',
+        'start_date': START, 'end_date': START + dt.timedelta(days=365)
+    } for project_id in project_ids for i in range(tasks)]
+    for start in range(0, len(rows), 20000):
+        db.session.execute(insert(Task), rows[start:start + 20000])
+
+    rows = [{
+        'company_id': company_id, 'first_name': 'Bench', 'last_name': str(i),
+        'email': f'user{i}@{BENCH_DOMAIN.format(company_id)}', 'password': '$2b$12$' + 'x' * 53,
+        'role': UserRole.EMPLOYEE
+    } for company_id in company_ids for i in range(users)]
+    for start in range(0, len(rows), 20000):
+        db.session.execute(insert(User), rows[start:start + 20000])
+    user_ids = db.session.execute(
+        select(User.id).where(User.company_id.in_(company_ids))).scalars().all()
+    rows = [{
+        'user_id': user_id, 'week_start': START + dt.timedelta(weeks=week), 'status': TimesheetStatus.APPROVED
+    } for user_id in user_ids for week in range(weeks)]
+    for start in range(0, len(rows), 20000):
+        db.session.execute(insert(Timesheet), rows[start:start + 20000])
+    db.session.commit()
+    return company_ids
+
+
+def plan(model, company_id):
+    stmt = select(model).options(*_tenant_criteria(company_id))
+    sql = str(stmt.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = db.session.execute(text(prefix + sql)).all()
+    return '\n'.join('    ' + ' '.join(str(part) for part in row) for row in rows)
+
+
+def measure(model, company_ids, samples):
+    timings = []
+    for company_id in random.sample(company_ids, min(samples, len(company_ids))):
+        with tenant_scope(company_id):
+            started = time.perf_counter()
+            model.query.all()
+            timings.append((time.perf_counter() - started) * 1000)
+        db.session.remove()
+    return statistics.median(timings)
+
+
+def run(label, company_ids, samples):
+    print(f'--- {label}')
+    sample_tenant = company_ids[len(company_ids) // 2]
+    for model in (Client, Project, Task, User, Timesheet):
+        print(f'{model.__tablename__:<12} median {measure(model, company_ids, samples):8.3f} ms')
+        print(plan(model, sample_tenant))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--clients', type=int, default=5)
+    parser.add_argument('--projects', type=int, default=4)
+    parser.add_argument('--tasks', type=int, default=10)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--weeks', type=int, default=10)
+    parser.add_argument('--samples', type=int, default=100)
+    options = parser.parse_args()
+
+    with app.app_context():
+        company_ids = seed(options.tenants, options.clients, options.projects,
+                           options.tasks, options.users, options.weeks)
+        print(f'{len(company_ids)} tenants')
+        run('with tenant indexes', company_ids, options.samples)
+
+        indexes = [index for table in db.metadata.tables.values() for index in table.indexes
+                   if index.name in TENANT_INDEXES]
+        for index in indexes:
+            index.drop(db.engine)
+        # Pooled SQLite connections keep cached EXPLAIN statements.
+        db.session.remove()
+        db.engine.dispose()
+        try:
+            run('without tenant indexes', company_ids, options.samples)
+        finally:
+            for index in indexes:
+                index.create(db.engine)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,10 +3,58 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY") 
     JWT_ALGORITHM = 'RS256'
-    PRIVATE_KEY_PATH = os.path.join(os.path.dirname(__file__), 'private.pem')
-    PUBLIC_KEY_PATH = os.path.join(os.path.dirname(__file__), 'public.pem')
+    # Keys come from the deployment's secrets; *.pem is never committed.
+    PRIVATE_KEY_PATH = os.getenv("PRIVATE_KEY_PATH", os.path.join(os.path.dirname(__file__), 'private.pem'))
+    PUBLIC_KEY_PATH = os.getenv("PUBLIC_KEY_PATH", os.path.join(os.path.dirname(__file__), 'public.pem'))
+    JWT_KEY_ID = os.getenv("JWT_KEY_ID")
+    JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR")
+    JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Engine and pool tuning; anything unset keeps the SQLAlchemy default.
+    DB_POOL_CLASS = os.getenv("DB_POOL_CLASS", "queue")  # or "null" to open a connection per checkout
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE")) if os.getenv("DB_POOL_SIZE") else None
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW")) if os.getenv("DB_MAX_OVERFLOW") else None
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT")) if os.getenv("DB_POOL_TIMEOUT") else None
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE")) if os.getenv("DB_POOL_RECYCLE") else None
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "").lower() == "true" if os.getenv("DB_POOL_PRE_PING") else None
+    DB_POOL_USE_LIFO = os.getenv("DB_POOL_USE_LIFO", "").lower() == "true" if os.getenv("DB_POOL_USE_LIFO") else None
+    SQLALCHEMY_REPLICA_URIS = os.getenv("SQLALCHEMY_REPLICA_URIS")  # comma-separated; reads of GET requests
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+    REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", 10))
+    REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", 2))  # seconds, PostgreSQL replicas
+    READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 0)) or None  # default: lag + interval
+    DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"  # transaction pooling: no server-side prepares
+    TOKEN_STORE_MODE = os.getenv("TOKEN_STORE_MODE", "allowlist")  # or "denylist"
+    # off | database | memory. "memory" checks revocation for every
+    # @jwt_required route without a database hit; a token revoked by another
+    # worker stays usable for up to REVOCATION_SYNC_INTERVAL seconds.
+    # "memory" requires TOKEN_STORE_MODE=denylist.
+    JWT_REVOCATION_CHECK = os.getenv("JWT_REVOCATION_CHECK", "off")
+    REVOCATION_SYNC_INTERVAL = int(os.getenv("REVOCATION_SYNC_INTERVAL", 30))
+    TOKEN_REVOCATION_CACHE_SIZE = int(os.getenv("TOKEN_REVOCATION_CACHE_SIZE", 10000))
+    TOKEN_REVOCATION_CACHE_TTL = int(os.getenv("TOKEN_REVOCATION_CACHE_TTL", 60))
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+    BCRYPT_POOL_KIND = os.getenv("BCRYPT_POOL_KIND", "thread")  # thread, process or inline
+    BCRYPT_POOL_WORKERS = int(os.getenv("BCRYPT_POOL_WORKERS", 0)) or None
+    BCRYPT_POOL_MAX_QUEUE = int(os.getenv("BCRYPT_POOL_MAX_QUEUE", 64))
+    BCRYPT_POOL_ACQUIRE_TIMEOUT = float(os.getenv("BCRYPT_POOL_ACQUIRE_TIMEOUT", 0.5))
+    USER_PAGE_SIZE = int(os.getenv("USER_PAGE_SIZE", 50))
+    USER_PAGE_SIZE_MAX = int(os.getenv("USER_PAGE_SIZE_MAX", 200))
+    USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", 10000))
+    USER_IMPORT_CHUNK_SIZE = int(os.getenv("USER_IMPORT_CHUNK_SIZE", 500))
+    BILLING_BATCH_SIZE = int(os.getenv("BILLING_BATCH_SIZE", 1000))
+    BILLING_WORKERS = int(os.getenv("BILLING_WORKERS", 0)) or None
+    # Match rows whose denormalized company_id is still NULL through their
+    # parents; set to false once `flask tenants backfill-company-id` is done.
+    TENANT_COMPANY_ID_FALLBACK = os.getenv("TENANT_COMPANY_ID_FALLBACK", "true").lower() == "true"
+    HTTP_CACHE_TTL = int(os.getenv("HTTP_CACHE_TTL", 0))  # per-worker payload cache; 0 disables
+    HTTP_CACHE_SIZE = int(os.getenv("HTTP_CACHE_SIZE", 5000))
+    HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 0))  # 0: clients revalidate with If-None-Match
+    SQL_STATEMENT_BUDGET_MODE = os.getenv("SQL_STATEMENT_BUDGET_MODE")  # off, warn or raise; raise when testing
+    SQL_STATEMENT_BUDGET = int(os.getenv("SQL_STATEMENT_BUDGET", 0))
+    METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", 0.1))  # share of requests with DB timing
+    METRICS_ENDPOINT = os.getenv("METRICS_ENDPOINT", "false").lower() == "true"  # unauthenticated; enable behind an internal network only
     MAIL_SERVER = 'smtp.gmail.com'  
     MAIL_PORT = 587
     MAIL_USE_TLS = True
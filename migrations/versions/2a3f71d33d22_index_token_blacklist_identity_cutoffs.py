@@ -0,0 +1,31 @@
+"""index token_blacklist identity cutoffs
+
+Revision ID: 2a3f71d33d22
+Revises: 
+Create Date: 2026-10-18 14:05:25.548551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a3f71d33d22'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables are created by db.create_all(); migrations only carry changes
+    # to existing databases, hence the if_not_exists guards.
+    op.create_index(
+        'ix_token_blacklist_user_identity_created_at',
+        'token_blacklist',
+        ['user_identity', 'created_at'],
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index('ix_token_blacklist_user_identity_created_at', table_name='token_blacklist', if_exists=True)
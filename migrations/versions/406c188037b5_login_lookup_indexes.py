@@ -0,0 +1,36 @@
+"""login lookup indexes
+
+Revision ID: 406c188037b5
+Revises: 2a3f71d33d22
+Create Date: 2026-10-18 14:08:32.265013
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '406c188037b5'
+down_revision = '2a3f71d33d22'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently so logins keep working while the indexes are created.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_companies_contact_email', 'companies', ['contact_email'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_users1_email_login', 'users1', ['email'],
+            postgresql_include=['id', 'password', 'company_id', 'role', 'first_name', 'last_name'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users1_email_login', table_name='users1', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_companies_contact_email', table_name='companies', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,38 @@
+"""tenant foreign key indexes
+
+Revision ID: 6b7b3f5589e0
+Revises: d4d12e6952cd
+Create Date: 2026-10-18 14:24:00.059321
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b7b3f5589e0'
+down_revision = 'd4d12e6952cd'
+branch_labels = None
+depends_on = None
+
+
+# users1.company_id and timesheets.user_id are already the leading columns
+# of ix_users1_company_id_id and uq_timesheets_user_week.
+INDEXES = (
+    ('ix_clients1_company_id', 'clients1', ['company_id']),
+    ('ix_projects_client_id', 'projects', ['client_id']),
+    ('ix_tasks_project_id', 'tasks', ['project_id']),
+    ('ix_roles_company_id', 'roles', ['company_id']),
+)
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,41 @@
+"""timesheet entries
+
+Revision ID: 6c145d7a35ef
+Revises: 7d9f95660ef4
+Create Date: 2026-10-18 14:13:24.776760
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c145d7a35ef'
+down_revision = '7d9f95660ef4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'timesheet_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('timesheet_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('work_date', sa.Date(), nullable=False),
+        sa.Column('minutes', sa.SmallInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.CheckConstraint('minutes >= 0 AND minutes <= 1440', name='ck_timesheet_entries_minutes'),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id']),
+        sa.ForeignKeyConstraint(['timesheet_id'], ['timesheets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('timesheet_id', 'task_id', 'work_date', name='uq_timesheet_entries_sheet_task_day'),
+        if_not_exists=True
+    )
+    op.create_index('ix_timesheet_entries_task_id', 'timesheet_entries', ['task_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_timesheet_entries_task_id', table_name='timesheet_entries', if_exists=True)
+    op.drop_table('timesheet_entries')
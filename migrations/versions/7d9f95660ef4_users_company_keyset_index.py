@@ -0,0 +1,29 @@
+"""users company keyset index
+
+Revision ID: 7d9f95660ef4
+Revises: 406c188037b5
+Create Date: 2026-10-18 14:11:38.346015
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d9f95660ef4'
+down_revision = '406c188037b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users1_company_id_id', 'users1', ['company_id', 'id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users1_company_id_id', table_name='users1', postgresql_concurrently=True, if_exists=True)
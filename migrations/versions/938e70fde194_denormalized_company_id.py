@@ -0,0 +1,62 @@
+"""denormalized company id
+
+Revision ID: 938e70fde194
+Revises: 6b7b3f5589e0
+Create Date: 2026-10-18 14:26:09.472615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '938e70fde194'
+down_revision = '6b7b3f5589e0'
+branch_labels = None
+depends_on = None
+
+
+# Nullable so the columns are added without a table rewrite; fill them
+# afterwards with `flask tenants backfill-company-id`, which works in short
+# id-range batches while the app keeps writing.
+TABLES = ('projects', 'tasks', 'timesheets')
+
+
+def upgrade():
+    bind = op.get_bind()
+    postgresql = bind.dialect.name == 'postgresql'
+    added = []
+    for table in TABLES:
+        columns = {column['name'] for column in sa.inspect(bind).get_columns(table)}
+        if 'company_id' in columns:
+            continue
+        op.add_column(table, sa.Column('company_id', sa.Integer(), nullable=True))
+        added.append(table)
+        if postgresql:
+            # NOT VALID skips the scan of existing rows, so the ACCESS
+            # EXCLUSIVE lock taken here is held only briefly.
+            op.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_company_id_fkey "
+                f"FOREIGN KEY (company_id) REFERENCES companies (id) NOT VALID"
+            )
+
+    with op.get_context().autocommit_block():
+        if postgresql:
+            # Outside the migration transaction, so the lock above is already
+            # released; VALIDATE only takes SHARE UPDATE EXCLUSIVE and lets
+            # writes continue while it scans.
+            for table in added:
+                op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_company_id_fkey")
+        for table in TABLES:
+            op.create_index(f'ix_{table}_company_id', table, ['company_id'],
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(f'ix_{table}_company_id', table_name=table, postgresql_concurrently=True, if_exists=True)
+    for table in TABLES:
+        if op.get_bind().dialect.name == 'postgresql':
+            op.drop_constraint(f'{table}_company_id_fkey', table, type_='foreignkey')
+        op.drop_column(table, 'company_id')
@@ -0,0 +1,48 @@
+"""unique timesheet per user week
+
+Revision ID: 9cc08cb1a377
+Revises: 6c145d7a35ef
+Create Date: 2026-10-18 14:13:59.650725
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9cc08cb1a377'
+down_revision = '6c145d7a35ef'
+branch_labels = None
+depends_on = None
+
+
+# Every sheet except the oldest one for its user and week.
+DUPLICATES = (
+    "SELECT t.id FROM timesheets t JOIN timesheets d "
+    "ON t.user_id = d.user_id AND t.week_start = d.week_start AND t.id > d.id"
+)
+
+
+def upgrade():
+    # Deleting a sheet cascades to its entries, so only empty duplicates
+    # are removed here; ones with entries need merging by hand first.
+    with_entries = op.get_bind().execute(sa.text(
+        f"SELECT DISTINCT timesheet_id FROM timesheet_entries WHERE timesheet_id IN ({DUPLICATES})"
+    )).scalars().all()
+    if with_entries:
+        raise RuntimeError(
+            "Duplicate timesheets for the same user and week still have entries "
+            f"(timesheet ids {', '.join(map(str, sorted(with_entries)))}); move or merge them "
+            "onto the oldest sheet for that week and rerun the migration."
+        )
+    op.execute(f"DELETE FROM timesheets WHERE id IN ({DUPLICATES})")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_timesheets_user_week', 'timesheets', ['user_id', 'week_start'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_timesheets_user_week', table_name='timesheets', postgresql_concurrently=True, if_exists=True)
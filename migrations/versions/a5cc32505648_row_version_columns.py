@@ -0,0 +1,34 @@
+"""row version columns
+
+Revision ID: a5cc32505648
+Revises: 938e70fde194
+Create Date: 2026-10-18 14:29:38.999300
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5cc32505648'
+down_revision = '938e70fde194'
+branch_labels = None
+depends_on = None
+
+
+# Versioned tables for optimistic locking. A constant default makes the
+# column a catalog-only change on PostgreSQL 11+, with no table rewrite.
+TABLES = ('companies', 'users1', 'clients1', 'projects', 'tasks')
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table in TABLES:
+        columns = {column['name'] for column in sa.inspect(bind).get_columns(table)}
+        if 'version_id' not in columns:
+            op.add_column(table, sa.Column('version_id', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_column(table, 'version_id')
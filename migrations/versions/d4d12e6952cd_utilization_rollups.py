@@ -0,0 +1,54 @@
+"""utilization rollups
+
+Revision ID: d4d12e6952cd
+Revises: 9cc08cb1a377
+Create Date: 2026-10-18 14:16:26.035184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4d12e6952cd'
+down_revision = '9cc08cb1a377'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Populate for already-approved sheets with `flask timesheets rebuild-rollups`.
+    op.create_table(
+        'utilization_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('client_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('week_start', sa.Date(), nullable=False),
+        sa.Column('month_start', sa.Date(), nullable=False),
+        sa.Column('billable', sa.Boolean(), nullable=False),
+        sa.Column('minutes', sa.Integer(), nullable=False),
+        sa.Column('billable_amount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users1.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['client_id'], ['clients1.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'company_id', 'user_id', 'project_id', 'week_start', 'month_start', 'billable',
+            name='uq_utilization_rollups_key'
+        ),
+        if_not_exists=True
+    )
+    op.create_index('ix_utilization_rollups_company_week', 'utilization_rollups',
+                    ['company_id', 'week_start'], if_not_exists=True)
+    op.create_index('ix_utilization_rollups_company_month', 'utilization_rollups',
+                    ['company_id', 'month_start'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_utilization_rollups_company_month', table_name='utilization_rollups', if_exists=True)
+    op.drop_index('ix_utilization_rollups_company_week', table_name='utilization_rollups', if_exists=True)
+    op.drop_table('utilization_rollups')
@@ -0,0 +1,97 @@
+import os
+import tempfile
+from datetime import date
+from types import SimpleNamespace
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+# Config reads the signing keys at import time, so a throwaway pair has to
+# exist before the app module is imported. Keys are never committed.
+_scratch = tempfile.mkdtemp(prefix='timesheets-tests-')
+_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+with open(os.path.join(_scratch, 'private.pem'), 'wb') as f:
+    f.write(_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                               serialization.NoEncryption()))
+with open(os.path.join(_scratch, 'public.pem'), 'wb') as f:
+    f.write(_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                           serialization.PublicFormat.SubjectPublicKeyInfo))
+os.environ['PRIVATE_KEY_PATH'] = os.path.join(_scratch, 'private.pem')
+os.environ['PUBLIC_KEY_PATH'] = os.path.join(_scratch, 'public.pem')
+os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(_scratch, 'import.db')}"
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+import pytest  # noqa: E402
+from app import create_app  # noqa: E402
+from utils.schema.models import db, Task  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'app.db'}")
+    app = create_app()
+    app.config['TESTING'] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def company(client):
+    """Register a company and log its admin in; returns ids and auth headers."""
+    def register(name, domain):
+        email = f'admin@{domain}'
+        response = client.post('/company/register', json={
+            'name': name, 'industry': 'Consulting', 'email_domain': domain, 'contact_email': email,
+            'contact_number': '555-0100', 'password': 'correct-horse', 'address': '1 Main St'
+        })
+        assert response.status_code == 201, response.get_json()
+        body = response.get_json()
+        login = client.post('/authenticate/login', json={'email': email, 'password': 'correct-horse'})
+        assert login.status_code == 200, login.get_json()
+        return SimpleNamespace(
+            id=body['company_id'],
+            admin_id=body['admin_user']['id'],
+            headers={'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        )
+    return register
+
+
+@pytest.fixture
+def workspace(app, client):
+    """Create a client, project, task and DRAFT timesheet for a company."""
+    def create(owner, prefix):
+        response = client.post('/client/add', json={'name': f'{prefix} Client', 'code': f'{prefix}-C',
+                                                     'company_id': owner.id})
+        assert response.status_code == 201, response.get_json()
+        client_id = response.get_json()['client']['id']
+
+        response = client.post('/projects/', headers=owner.headers, json={
+            'client_id': client_id, 'name': f'{prefix} Project', 'code': f'{prefix}-P',
+            'start_date': '2025-01-01', 'end_date': '2025-12-31', 'employee_rate': 100, 'status': 'active'
+        })
+        assert response.status_code == 201, response.get_json()
+        project_id = response.get_json()['project']['id']
+
+        # POST /tasks/ hands date strings to the model, which only
+        # PostgreSQL accepts; insert the task directly instead.
+        with app.app_context():
+            task = Task(project_id=project_id, company_id=owner.id, name=f'{prefix} Task', code=f'{prefix}-T',
+                        billable=True, start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+            db.session.add(task)
+            db.session.commit()
+            task_id = task.id
+
+        response = client.post('/timesheets/', json={'user_id': owner.admin_id, 'week_start': '2025-06-02'})
+        assert response.status_code == 201, response.get_json()
+        timesheet_id = response.get_json()['timesheet']['id']
+
+        return SimpleNamespace(client_id=client_id, project_id=project_id, task_id=task_id,
+                               timesheet_id=timesheet_id)
+    return create
@@ -0,0 +1,100 @@
+import pytest
+
+
+@pytest.fixture
+def acme(company):
+    return company('Acme', 'acme.test')
+
+
+def test_put_with_current_version_succeeds(client, acme, workspace):
+    rows = workspace(acme, 'ACME')
+    etag = client.get(f'/tasks/{rows.task_id}', headers=acme.headers).headers['ETag']
+    assert etag == f'"task-{rows.task_id}-v1"'
+
+    response = client.put(f'/tasks/{rows.task_id}', headers={**acme.headers, 'If-Match': etag},
+                          json={'name': 'Renamed'})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] == f'"task-{rows.task_id}-v2"'
+
+
+def test_put_with_stale_version_conflicts(client, acme, workspace):
+    rows = workspace(acme, 'ACME')
+    stale = f'"task-{rows.task_id}-v1"'
+    assert client.put(f'/tasks/{rows.task_id}', headers={**acme.headers, 'If-Match': stale},
+                      json={'name': 'First'}).status_code == 200
+
+    response = client.put(f'/tasks/{rows.task_id}', headers={**acme.headers, 'If-Match': stale},
+                          json={'name': 'Second'})
+
+    assert response.status_code == 409
+    assert response.get_json()['version'] == 2
+    assert client.get(f'/tasks/{rows.task_id}', headers=acme.headers).get_json()['name'] == 'First'
+
+
+@pytest.mark.parametrize('method, url, namespace, body', [
+    ('put', '/client/update/{client_id}', 'client', {'name': 'Renamed'}),
+    ('patch', '/client/{client_id}', 'client', {'name': 'Renamed'}),
+    ('put', '/projects/{project_id}', 'project', {'name': 'Renamed', 'code': 'ACME-P'}),
+    ('patch', '/projects/{project_id}', 'project', {'name': 'Renamed'}),
+    ('patch', '/tasks/{task_id}', 'task', {'name': 'Renamed'}),
+])
+def test_stale_and_current_versions_on_other_routes(client, acme, workspace, method, url, namespace, body):
+    rows = workspace(acme, 'ACME')
+    url = url.format(**vars(rows))
+    object_id = url.rsplit('/', 1)[1]
+    send = getattr(client, method)
+
+    stale = send(url, headers={**acme.headers, 'If-Match': f'"{namespace}-{object_id}-v7"'}, json=body)
+    assert stale.status_code == 409
+
+    current = send(url, headers={**acme.headers, 'If-Match': f'"{namespace}-{object_id}-v1"'}, json=body)
+    assert current.status_code == 200
+    assert current.headers['ETag'] == f'"{namespace}-{object_id}-v2"'
+
+
+def test_company_and_user_updates_check_the_version(client, acme):
+    company_tag = f'"company-{acme.id}-v1"'
+    assert client.put(f'/company/update/{acme.id}', headers={**acme.headers, 'If-Match': company_tag},
+                      json={'name': 'Acme Two'}).status_code == 200
+    assert client.put(f'/company/update/{acme.id}', headers={**acme.headers, 'If-Match': company_tag},
+                      json={'name': 'Acme Three'}).status_code == 409
+
+    user_tag = f'"user-{acme.admin_id}-v1"'
+    assert client.put(f'/user/update/{acme.admin_id}', headers={**acme.headers, 'If-Match': user_tag},
+                      json={'phone': '555-0199'}).status_code == 200
+    assert client.put(f'/user/update/{acme.admin_id}', headers={**acme.headers, 'If-Match': user_tag},
+                      json={'phone': '555-0198'}).status_code == 409
+
+
+def test_weak_if_match_is_ignored(client, acme, workspace):
+    rows = workspace(acme, 'ACME')
+
+    response = client.put(f'/tasks/{rows.task_id}',
+                          headers={**acme.headers, 'If-Match': f'W/"task-{rows.task_id}-v1"'},
+                          json={'name': 'Renamed'})
+
+    assert response.status_code == 409
+    assert client.get(f'/tasks/{rows.task_id}', headers=acme.headers).get_json()['version'] == 1
+
+
+def test_if_match_for_another_row_conflicts(client, acme, workspace):
+    rows = workspace(acme, 'ACME')
+
+    response = client.put(f'/tasks/{rows.task_id}', headers={**acme.headers, 'If-Match': '"client-1-v1"'},
+                          json={'name': 'Renamed'})
+
+    assert response.status_code == 409
+
+
+def test_company_profile_etag_is_per_company(client, company):
+    acme = company('Acme', 'acme.test')
+    beta = company('Beta', 'beta.test')
+
+    first = client.get('/company/profile', headers=acme.headers)
+    assert 'Authorization' in first.headers['Vary']
+
+    response = client.get('/company/profile', headers={**beta.headers, 'If-None-Match': first.headers['ETag']})
+
+    assert response.status_code == 200
+    assert response.get_json()['name'] == 'Beta'
@@ -0,0 +1,52 @@
+def test_company_sees_its_own_rows(client, company, workspace):
+    acme = company('Acme', 'acme.test')
+    rows = workspace(acme, 'ACME')
+
+    assert client.get(f'/client/{rows.client_id}', headers=acme.headers).status_code == 200
+    assert client.get(f'/tasks/{rows.task_id}', headers=acme.headers).status_code == 200
+    assert client.get(f'/timesheets/{rows.timesheet_id}/entries', headers=acme.headers).status_code == 200
+
+
+def test_other_company_gets_404(client, company, workspace):
+    acme = company('Acme', 'acme.test')
+    rows = workspace(acme, 'ACME')
+    beta = company('Beta', 'beta.test')
+
+    assert client.get(f'/client/{rows.client_id}', headers=beta.headers).status_code == 404
+    assert client.get(f'/tasks/{rows.task_id}', headers=beta.headers).status_code == 404
+    assert client.post(f'/timesheets/{rows.timesheet_id}/submit', headers=beta.headers).status_code == 404
+    assert client.get(f'/timesheets/{rows.timesheet_id}/entries', headers=beta.headers).status_code == 404
+    response = client.put(f'/timesheets/{rows.timesheet_id}/entries', headers=beta.headers, json={
+        'entries': [{'task_id': rows.task_id, 'work_date': '2025-06-02', 'minutes': 60}]
+    })
+    assert response.status_code == 404
+
+
+def test_other_company_cannot_log_time_to_foreign_task(client, company, workspace):
+    acme = company('Acme', 'acme.test')
+    acme_rows = workspace(acme, 'ACME')
+    beta = company('Beta', 'beta.test')
+    beta_rows = workspace(beta, 'BETA')
+
+    response = client.put(f'/timesheets/{beta_rows.timesheet_id}/entries', headers=beta.headers, json={
+        'entries': [{'task_id': acme_rows.task_id, 'work_date': '2025-06-02', 'minutes': 60}]
+    })
+    assert response.status_code == 400
+    assert response.get_json()['task_ids'] == [acme_rows.task_id]
+
+
+def test_bulk_import_rejects_email_used_by_another_company(client, company):
+    company('Acme', 'acme.test')
+    beta = company('Beta', 'beta.test')
+
+    body = '\n'.join([
+        '{"first_name": "Ann", "last_name": "Lee", "email": "admin@acme.test", "password": "pw", "role": "employee"}',
+        '{"first_name": "Bob", "last_name": "Ray", "email": "bob@beta.test", "password": "pw", "role": "employee"}',
+    ])
+    response = client.post('/user/bulk', headers=beta.headers, data=body, content_type='application/x-ndjson')
+
+    assert response.status_code == 200
+    results = {row['email']: row for row in response.get_json()['results']}
+    assert results['admin@acme.test']['status'] == 'error'
+    assert results['admin@acme.test']['error'] == 'Email already exists'
+    assert results['bob@beta.test']['status'] == 'created'
@@ -3,8 +3,10 @@ from utils.schema.models import User, Company,TokenBlacklist
 from datetime import datetime
 from utils.schema.models import db
 from utils.api.authentication.auth_helper import AccessTokens
-from utils.api.authentication.auth_helper import passwordHelper, AccessTokens
-from utils.controllers import login_user
+from utils.api.authentication.auth_helper import passwordHelper, AccessTokens, revocation_cache, revoked_tokens
+from utils.api.authentication.hashing_pool import HashingPoolSaturated
+from utils.controllers import login_user, find_login_user, store_rehashed_password
+from utils.http_cache import response_cache
 from enum import Enum
 from flask_jwt_extended import get_jwt, jwt_required, get_jwt_identity
 # from itsdangerous import URLSafeTimedSerializer
@@ -23,12 +25,15 @@ def unified_login():
     if not email or not password:
         return jsonify({"error": "Email and password are required"}), 400
 
-    user = User.query.filter_by(email=email).first()
+    user = find_login_user(email)
     if not user:
         return jsonify({"error": "Invalid credentials"}), 401
 
-    if not passwordHelper.check_password(user.password, password):
+    matched, new_hash = passwordHelper.verify_and_update(password, user.password)
+    if not matched:
         return jsonify({"error": "Invalid credentials"}), 401
+    if new_hash:
+        store_rehashed_password(User, user.id, new_hash)
 
     # Determine role
     role = user.role.name if hasattr(user.role, 'name') else user.role
@@ -68,7 +73,8 @@ def logout():
         jti = get_jwt()["jti"]
         token_type = get_jwt()["type"]
         user_identity = get_jwt_identity()
-        expires = datetime.fromtimestamp(get_jwt()["exp"])
+        # Naive UTC, like every other expires value the sweeper compares.
+        expires = datetime.utcfromtimestamp(get_jwt()["exp"])
         epoch_expires = get_jwt()["exp"]
         
         # Add token to blacklist
@@ -85,6 +91,9 @@ def logout():
         
         db.session.add(blacklisted_token)
         db.session.commit()
+        revocation_cache.invalidate(jti)
+        if AccessTokens.in_memory_revocation():
+            revoked_tokens.add(jti, epoch_expires)
         
         return jsonify({"message": "Successfully logged out"}), 200
     
@@ -106,33 +115,28 @@ def change_password():
         data = request.get_json()
         old_password = data.get('old_password')
         new_password = data.get('new_password')
-        # Debug prints
-        print(f"Received - Old: {old_password}, New: {new_password}")
-        print(f"DB Hash: {user.password}")
-        print(f"Old Password Correct: {passwordHelper.check_password(user.password, old_password)}")
 
         # Validation
         if not all([old_password, new_password]):
             return jsonify({"error": "Both passwords are required"}), 400
 
-        if not passwordHelper.check_password(user.password, old_password):
+        if not passwordHelper.check_password(old_password, user.password):
             return jsonify({"error": "Old password is incorrect"}), 401
 
         if old_password == new_password:
-            return jsonify({
-                "error": "New password cannot be same as old",
-                "debug": {
-                    "old_password_match": passwordHelper.check_password(user.password, old_password),
-                    "new_password_similarity": old_password == new_password
-                }
-            }), 400
+            return jsonify({"error": "New password cannot be same as old"}), 400
 
         # Update password
         user.password = passwordHelper.hash_password(new_password)
         db.session.commit()
+        # The write bumped version_id, so the cached ETag is stale.
+        response_cache.invalidate('user', user.id)
 
         return jsonify({"message": "Password changed successfully"}), 200
 
+    except HashingPoolSaturated:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
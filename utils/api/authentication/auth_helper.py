@@ -1,32 +1,183 @@
 import bcrypt
-from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, get_jti
-from flask import jsonify, Blueprint
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, get_jti, jwt_required
+from flask import jsonify, Blueprint, current_app
+from sqlalchemy import or_, and_
 from datetime import datetime, timedelta
+from config import Config
 from utils.schema.models import db, TokenBlacklist, User
+from utils.api.authentication.hashing_pool import BcryptPool, HashingPoolSaturated
+from utils.api.authentication.hashers import PasswordHasher
+from utils.api.authentication.keys import key_manager
+from utils.api.authentication.revocation_sync import RevokedTokenSet
 
 auth_helper = Blueprint('auth_helper', __name__)
 
 jwt = JWTManager()
 
+bcrypt_pool = BcryptPool(
+    kind=Config.BCRYPT_POOL_KIND,
+    workers=Config.BCRYPT_POOL_WORKERS,
+    max_queue=Config.BCRYPT_POOL_MAX_QUEUE,
+    acquire_timeout=Config.BCRYPT_POOL_ACQUIRE_TIMEOUT
+)
+
+password_hasher = PasswordHasher(bcrypt_pool, cost=Config.BCRYPT_ROUNDS)
+
 class passwordHelper:
     @staticmethod
     def hash_password(password):
-        try: 
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-            return hashed_password.decode('utf-8')
+        """Hash ``password``; raises ValueError if it cannot be hashed."""
+        try:
+            return password_hasher.hash(password)
+        except HashingPoolSaturated:
+            raise
         except Exception as e:
-            return jsonify({'message': 'Error hashing password: ' + str(e)}), 500
+            raise ValueError(f'Error hashing password: {e}') from e
+    @staticmethod
+    def hash_passwords(passwords):
+        """Hash a batch of passwords in parallel on the bcrypt pool."""
+        return password_hasher.hash_many(passwords)
+
     @staticmethod
     def check_password( password, hashed):
         try:
-            return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-        except Exception as e:
-            return jsonify({'message': 'Error checking password: ' + str(e)}), 500
+            return password_hasher.verify(password, hashed)
+        except HashingPoolSaturated:
+            raise
+        except Exception:
+            return False
+
+    @staticmethod
+    def verify_and_update(password, hashed):
+        """Check ``password`` and return ``(matched, new_hash)``.
+
+        ``new_hash`` is set when the password matched but ``hashed`` uses a
+        legacy scheme or a different cost than BCRYPT_ROUNDS; the caller
+        should store it in place of the old hash.
+        """
+        if not passwordHelper.check_password(password, hashed):
+            return False, None
+        if password_hasher.needs_rehash(hashed):
+            return True, passwordHelper.hash_password(password)
+        return True, None
+
+class RevocationCache:
+    """Per-process cache of revocation lookups keyed by jti.
+
+    Entries never outlive the token's own ``exp``. Revoked tokens stay
+    revoked, so they are kept until expiry; "not revoked" answers are
+    additionally capped at ``max_ttl`` seconds so a revocation made by
+    another process is picked up within that window. The least recently
+    used entry is evicted once ``maxsize`` is reached.
+    """
+
+    def __init__(self, maxsize=10000, max_ttl=60):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()  # jti -> (revoked, expires_at, identity)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, jti):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None:
+                self.misses += 1
+                return None
+            revoked, expires_at, _ = entry
+            if expires_at <= now:
+                del self._entries[jti]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(jti)
+            self.hits += 1
+            return revoked
+
+    def set(self, jti, revoked, exp, identity=None):
+        now = time.time()
+        expires_at = exp if revoked else min(exp, now + self.max_ttl)
+        if expires_at <= now or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[jti] = (revoked, expires_at, identity)
+            self._entries.move_to_end(jti)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, jti):
+        with self._lock:
+            self._entries.pop(jti, None)
+
+    def invalidate_identity(self, identity):
+        identity = str(identity)
+        with self._lock:
+            stale = [jti for jti, entry in self._entries.items() if entry[2] == identity]
+            for jti in stale:
+                del self._entries[jti]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "max_ttl": self.max_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+revocation_cache = RevocationCache(
+    maxsize=Config.TOKEN_REVOCATION_CACHE_SIZE,
+    max_ttl=Config.TOKEN_REVOCATION_CACHE_TTL
+)
+
+revoked_tokens = RevokedTokenSet(sync_interval=Config.REVOCATION_SYNC_INTERVAL)
+
+
+def _epoch(utc_datetime):
+    return int((utc_datetime - datetime(1970, 1, 1)).total_seconds())
+
 
 class AccessTokens:
+    """Issues and revokes JWTs.
+
+    ``TOKEN_STORE_MODE`` picks how token_blacklist is used:
+
+    * ``allowlist`` (default) - a row is written for every issued token and
+      a token without a row is treated as revoked.
+    * ``denylist`` - only revoked JTIs are stored and a token without a row
+      is valid. Logging in no longer writes to the database.
+    """
+
+    @staticmethod
+    def in_memory_revocation():
+        return current_app.config.get('JWT_REVOCATION_CHECK', 'off') == 'memory'
+
+    @staticmethod
+    def deny_list_only():
+        return current_app.config.get('TOKEN_STORE_MODE', 'allowlist') == 'denylist'
+
     @staticmethod
     def create_access_token( identity, additional_claims=None):
         access_token = create_access_token(identity=identity, additional_claims=additional_claims)
+        if AccessTokens.deny_list_only():
+            return access_token
         jti = get_jti(access_token)
         token = TokenBlacklist(
             jti=jti,
@@ -42,6 +193,8 @@ class AccessTokens:
     @staticmethod
     def create_refresh_token( identity, additional_claims=None):
         refresh_token = create_refresh_token(identity=identity, additional_claims=additional_claims)
+        if AccessTokens.deny_list_only():
+            return refresh_token
         jti = get_jti(refresh_token)
         token = TokenBlacklist(
             jti=jti,
@@ -60,12 +213,127 @@ class AccessTokens:
         if token:
             token.revoked = True
             db.session.commit()
+            if AccessTokens.in_memory_revocation():
+                revoked_tokens.add(jti, token.epoch_expires or _epoch(token.expires))
+        revocation_cache.invalidate(jti)
+
+    @staticmethod
+    def revoke_identity(identity):
+        """Revoke every token issued to ``identity`` so far.
+
+        Does not commit; callers commit together with their own changes.
+        """
+        identity = str(identity)
+        refresh_expires = current_app.config.get('JWT_REFRESH_TOKEN_EXPIRES', timedelta(days=7))
+        if not isinstance(refresh_expires, timedelta):
+            refresh_expires = timedelta(seconds=refresh_expires)
+        now = datetime.utcnow()
+        epoch_expires = _epoch(now + refresh_expires)
+
+        TokenBlacklist.query.filter_by(user_identity=identity, revoked=False).update(
+            {"revoked": True}, synchronize_session=False
+        )
+        if AccessTokens.deny_list_only():
+            # No per-token rows exist, so record a cutoff: tokens for this
+            # identity issued before now are revoked.
+            db.session.add(TokenBlacklist(
+                jti=str(uuid.uuid4()),
+                token_type="all",
+                user_identity=identity,
+                revoked=True,
+                expires=now + refresh_expires,
+                epoch_expires=epoch_expires,
+                created_at=now,
+                updated_at=now
+            ))
+        if AccessTokens.in_memory_revocation():
+            revoked_tokens.add_cutoff(identity, now, epoch_expires)
 
     @staticmethod
     def is_token_revoked(jwt_payload):
+        if AccessTokens.in_memory_revocation():
+            return revoked_tokens.is_revoked(jwt_payload)
+
         jti = jwt_payload['jti']
-        token = TokenBlacklist.query.filter_by(jti=jti).first()
-        return token.revoked if token else True
+        revoked = revocation_cache.get(jti)
+        if revoked is not None:
+            return revoked
+
+        if AccessTokens.deny_list_only():
+            # iat is whole seconds: a cutoff revokes tokens issued in earlier
+            # seconds, so logging in again right after revoke_identity works.
+            issued_at = datetime.utcfromtimestamp(jwt_payload.get('iat', 0))
+            token = TokenBlacklist.query.filter(
+                TokenBlacklist.revoked.is_(True),
+                or_(
+                    TokenBlacklist.jti == jti,
+                    and_(
+                        TokenBlacklist.token_type == "all",
+                        TokenBlacklist.user_identity == str(jwt_payload.get('sub')),
+                        TokenBlacklist.created_at >= issued_at + timedelta(seconds=1)
+                    )
+                )
+            ).first()
+            revoked = token is not None
+        else:
+            # Logout stores a second row for the same jti, so prefer a revoked one.
+            token = TokenBlacklist.query.filter_by(jti=jti).order_by(TokenBlacklist.revoked.desc()).first()
+            revoked = token.revoked if token else True
+        revocation_cache.set(jti, revoked, jwt_payload['exp'], identity=jwt_payload.get('sub'))
+        return revoked
+
+
+def validate_revocation_config(config):
+    """Reject JWT_REVOCATION_CHECK / TOKEN_STORE_MODE combinations that would accept revoked tokens."""
+    mode = config.get('JWT_REVOCATION_CHECK', 'off')
+    if mode not in ('off', 'database', 'memory'):
+        raise ValueError(f"JWT_REVOCATION_CHECK must be off, database or memory, not {mode!r}")
+    if mode == 'memory' and config.get('TOKEN_STORE_MODE', 'allowlist') != 'denylist':
+        raise ValueError(
+            "JWT_REVOCATION_CHECK=memory needs TOKEN_STORE_MODE=denylist: the in-memory set "
+            "only knows revoked JTIs, so it would accept tokens the allowlist never issued"
+        )
+
+
+def check_if_token_revoked(jwt_header, jwt_payload):
+    """Blocklist loader applied to every @jwt_required route.
+
+    JWT_REVOCATION_CHECK selects the source: ``memory`` answers from the
+    periodically synced RevokedTokenSet (no database hit, staleness up to
+    REVOCATION_SYNC_INTERVAL seconds), ``database`` goes through
+    AccessTokens.is_token_revoked, and ``off`` leaves revocation to the
+    routes that check it explicitly. The memory set only knows revoked
+    JTIs, so a token without any token_blacklist row is accepted there as
+    in TOKEN_STORE_MODE=denylist; ``validate_revocation_config`` refuses
+    it together with the allowlist.
+    """
+    mode = current_app.config.get('JWT_REVOCATION_CHECK', 'off')
+    if mode == 'off':
+        return False
+    return AccessTokens.is_token_revoked(jwt_payload)
+
+
+@auth_helper.route('/.well-known/jwks.json', methods=['GET'])
+def jwks():
+    return jsonify(key_manager.jwks()), 200, {"Cache-Control": "public, max-age=300"}
+
+
+@auth_helper.route('/authenticate/token-cache/stats', methods=['GET'])
+@jwt_required()
+def token_cache_stats():
+    return jsonify(revocation_cache.stats()), 200
+
+
+@auth_helper.route('/authenticate/revoked-set/stats', methods=['GET'])
+@jwt_required()
+def revoked_set_stats():
+    return jsonify(revoked_tokens.stats()), 200
+
+
+@auth_helper.route('/authenticate/hashing-pool/stats', methods=['GET'])
+@jwt_required()
+def hashing_pool_stats():
+    return jsonify(bcrypt_pool.stats()), 200
 
 @jwt.additional_claims_loader
 def add_claims_to_access_token(identity):
@@ -0,0 +1,226 @@
+import time
+import click
+from datetime import datetime, date
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select, delete, text, or_, and_
+from utils.schema.models import db, TokenBlacklist
+
+tokens_cli = AppGroup('tokens', help='Maintenance commands for the token_blacklist table.')
+
+
+PARTITION_PREFIX = 'token_blacklist_p'
+DEFAULT_PARTITION = 'token_blacklist_default'
+
+
+def _delete_in_batches(criteria, batch_size, max_batches=0, pause=0):
+    """Delete matching token_blacklist rows one short transaction at a time."""
+    total = 0
+    batches = 0
+    while True:
+        ids = select(TokenBlacklist.id).where(*criteria).limit(batch_size).scalar_subquery()
+        result = db.session.execute(
+            delete(TokenBlacklist).where(TokenBlacklist.id.in_(ids)),
+            execution_options={"synchronize_session": False}
+        )
+        db.session.commit()
+        total += result.rowcount
+        batches += 1
+        if result.rowcount < batch_size or (max_batches and batches >= max_batches):
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _is_postgres():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def _is_partitioned():
+    if not _is_postgres():
+        return False
+    return db.session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('token_blacklist')"
+    )).first() is not None
+
+
+def _partition_months():
+    rows = db.session.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'token_blacklist'::regclass"
+    )).scalars()
+    months = {}
+    for name in rows:
+        if name.startswith(PARTITION_PREFIX):
+            suffix = name[len(PARTITION_PREFIX):]
+            months[date(int(suffix[:4]), int(suffix[4:6]), 1)] = name
+    return months
+
+
+def _current_month():
+    return datetime.utcnow().date().replace(day=1)
+
+
+def _has_default_partition():
+    return db.session.execute(
+        text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}
+    ).scalar() is not None
+
+
+def _create_partitions(first_month, last_month):
+    """Create any missing monthly partitions between the two months, inclusive.
+
+    Rows that landed in the DEFAULT partition for a month are moved into
+    the new partition; PostgreSQL refuses to create it while they remain.
+    """
+    existing = _partition_months()
+    has_default = _has_default_partition()
+    month = first_month
+    created = []
+    while month <= last_month:
+        if month not in existing:
+            name = f"{PARTITION_PREFIX}{month:%Y%m}"
+            bounds = f"'{month.isoformat()}'", f"'{_add_months(month, 1).isoformat()}'"
+            if has_default:
+                db.session.execute(text(
+                    f"CREATE TEMP TABLE {name}_moved ON COMMIT DROP AS "
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                    f"WHERE expires >= {bounds[0]} AND expires < {bounds[1]} RETURNING *) "
+                    f"SELECT * FROM moved"
+                ))
+            db.session.execute(text(
+                f"CREATE TABLE {name} PARTITION OF token_blacklist FOR VALUES FROM ({bounds[0]}) TO ({bounds[1]})"
+            ))
+            if has_default:
+                db.session.execute(text(f"INSERT INTO token_blacklist SELECT * FROM {name}_moved"))
+            created.append(name)
+        month = _add_months(month, 1)
+    return created
+
+
+def _drop_expired_partitions():
+    """Detach and drop partitions whose whole range lies in the past."""
+    current_month = _current_month()
+    dropped = []
+    for month, name in sorted(_partition_months().items()):
+        if _add_months(month, 1) <= current_month:
+            db.session.execute(text("SET LOCAL lock_timeout = '5s'"))
+            db.session.execute(text(f"ALTER TABLE token_blacklist DETACH PARTITION {name}"))
+            db.session.execute(text(f"DROP TABLE {name}"))
+            db.session.commit()
+            dropped.append(name)
+    return dropped
+
+
+@tokens_cli.command('prune-allowlist')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows deleted per transaction.')
+@click.option('--force', is_flag=True, help='Run even if TOKEN_STORE_MODE is not "denylist".')
+def prune_allowlist(batch_size, force):
+    """Delete the non-revoked rows left over from allowlist mode.
+
+    Switching TOKEN_STORE_MODE from "allowlist" to "denylist" is safe at any
+    time: revoked rows keep being honoured and tokens without a row become
+    valid. Once every worker runs in denylist mode the remaining
+    ``revoked = false`` rows are dead weight and can be removed with this
+    command. Do not run it while any worker is still in allowlist mode, as
+    those workers would treat every outstanding token as revoked.
+    """
+    if current_app.config.get('TOKEN_STORE_MODE') != 'denylist' and not force:
+        raise click.UsageError('TOKEN_STORE_MODE is not "denylist"; pass --force to prune anyway.')
+
+    deleted = _delete_in_batches([TokenBlacklist.revoked.is_(False)], batch_size)
+    click.echo(f'Deleted {deleted} allowlist rows from token_blacklist.')
+
+
+@tokens_cli.command('sweep')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows deleted per transaction.')
+@click.option('--max-batches', default=0, show_default=True, help='Stop after this many batches (0 = until done).')
+@click.option('--pause', default=0.05, show_default=True, help='Seconds to sleep between batches.')
+@click.option('--interval', default=0, show_default=True, help='Repeat every N seconds (0 = run once).')
+@click.option('--months-ahead', default=2, show_default=True, help='Partitions to keep created ahead of now.')
+def sweep(batch_size, max_batches, pause, interval, months_ahead):
+    """Purge expired token_blacklist rows.
+
+    Rows are deleted in small batches, each in its own transaction, so no
+    lock is held for long. With the partitioned layout (see ``tokens
+    partition``) whole expired partitions are dropped first and upcoming
+    ones are created. Run it from cron, or pass ``--interval`` to keep it
+    running as a sidecar process.
+    """
+    while True:
+        if _is_partitioned():
+            for name in _drop_expired_partitions():
+                click.echo(f'Dropped partition {name}.')
+            for name in _create_partitions(_current_month(), _add_months(_current_month(), months_ahead)):
+                click.echo(f'Created partition {name}.')
+            db.session.commit()
+
+        # The numeric exp is authoritative; expires is only used for rows
+        # written without one.
+        deleted = _delete_in_batches([or_(
+            TokenBlacklist.epoch_expires < int(time.time()),
+            and_(TokenBlacklist.epoch_expires.is_(None), TokenBlacklist.expires < datetime.utcnow())
+        )], batch_size, max_batches, pause)
+        click.echo(f'Deleted {deleted} expired rows from token_blacklist.')
+
+        if not interval:
+            return
+        time.sleep(interval)
+
+
+@tokens_cli.command('partition')
+@click.option('--months-ahead', default=2, show_default=True, help='Partitions to create ahead of now.')
+def partition(months_ahead):
+    """Convert token_blacklist to monthly range partitions on ``expires``.
+
+    PostgreSQL only. Unexpired rows are copied into the new layout inside a
+    single transaction while the old table is locked, so run it during a
+    quiet period. Afterwards ``tokens sweep`` drops expired months instead
+    of deleting their rows one by one. Run it at least monthly so that new
+    tokens land in monthly partitions rather than the DEFAULT one.
+    """
+    if not _is_postgres():
+        raise click.UsageError('Partitioning requires PostgreSQL.')
+    if _is_partitioned():
+        click.echo('token_blacklist is already partitioned.')
+        return
+
+    statements = [
+        "SET LOCAL lock_timeout = '5s'",
+        "LOCK TABLE token_blacklist IN ACCESS EXCLUSIVE MODE",
+        "ALTER TABLE token_blacklist RENAME TO token_blacklist_unpartitioned",
+        "ALTER TABLE token_blacklist_unpartitioned RENAME CONSTRAINT token_blacklist_pkey TO token_blacklist_unpartitioned_pkey",
+        "ALTER INDEX ix_token_blacklist_jti RENAME TO ix_token_blacklist_unpartitioned_jti",
+        "ALTER INDEX IF EXISTS ix_token_blacklist_user_identity_created_at "
+        "RENAME TO ix_token_blacklist_unpartitioned_user_identity_created_at",
+        "CREATE TABLE token_blacklist (LIKE token_blacklist_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (expires)",
+        "ALTER SEQUENCE token_blacklist_id_seq OWNED BY token_blacklist.id",
+        "ALTER TABLE token_blacklist ADD PRIMARY KEY (id, expires)",
+        "CREATE INDEX ix_token_blacklist_jti ON token_blacklist (jti)",
+        "CREATE INDEX ix_token_blacklist_user_identity_created_at ON token_blacklist (user_identity, created_at)",
+    ]
+    for statement in statements:
+        db.session.execute(text(statement))
+
+    last_month = _add_months(_current_month(), months_ahead)
+    latest = db.session.execute(text("SELECT max(expires) FROM token_blacklist_unpartitioned")).scalar()
+    if latest and latest.date().replace(day=1) > last_month:
+        last_month = latest.date().replace(day=1)
+    _create_partitions(_current_month(), last_month)
+    # Catches tokens expiring past the last monthly partition, so inserts
+    # never fail; `tokens sweep` moves them out as their month is created.
+    db.session.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF token_blacklist DEFAULT"))
+    db.session.execute(text(
+        "INSERT INTO token_blacklist SELECT * FROM token_blacklist_unpartitioned "
+        "WHERE expires >= now() AT TIME ZONE 'utc'"
+    ))
+    db.session.execute(text("DROP TABLE token_blacklist_unpartitioned"))
+    db.session.commit()
+    click.echo('token_blacklist is now partitioned by month on expires.')
@@ -0,0 +1,102 @@
+import time
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+def _check_werkzeug(password, hashed):
+    started = time.perf_counter()
+    matched = check_password_hash(hashed, password)
+    return matched, time.perf_counter() - started
+
+
+class BcryptScheme:
+    """``$2b$<cost>$<salt+digest>`` - the scheme new hashes are written in."""
+    name = 'bcrypt'
+
+    @staticmethod
+    def identify(hashed):
+        return hashed.startswith(('$2a$', '$2b$', '$2y$'))
+
+    @staticmethod
+    def cost(hashed):
+        return int(hashed.split('$')[2])
+
+    @staticmethod
+    def hash(pool, password, cost):
+        return pool.hash(password.encode('utf-8'), cost).decode('utf-8')
+
+    @staticmethod
+    def hash_many(pool, passwords, cost):
+        hashed = pool.hash_many([password.encode('utf-8') for password in passwords], cost)
+        return [value.decode('utf-8') for value in hashed]
+
+    @staticmethod
+    def verify(pool, password, hashed):
+        return pool.check(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+class WerkzeugScheme:
+    """``<method>:<params>$<salt>$<digest>`` as written by generate_password_hash."""
+    name = 'werkzeug'
+
+    @staticmethod
+    def identify(hashed):
+        return hashed.startswith(('pbkdf2:', 'scrypt:'))
+
+    @staticmethod
+    def cost(hashed):
+        return hashed.split('$', 1)[0]
+
+    @staticmethod
+    def hash(pool, password, cost):
+        return generate_password_hash(password)
+
+    @staticmethod
+    def hash_many(pool, passwords, cost):
+        return [generate_password_hash(password) for password in passwords]
+
+    @staticmethod
+    def verify(pool, password, hashed):
+        return pool.run(_check_werkzeug, password, hashed)
+
+
+class PasswordHasher:
+    """Hashes with ``scheme`` at ``cost`` and verifies any known scheme.
+
+    Every stored hash carries its algorithm and cost in its own prefix, so
+    changing the configured cost (or moving off a legacy scheme) only needs
+    ``needs_rehash`` to be checked after a successful login.
+    """
+
+    def __init__(self, pool, cost=12, scheme=BcryptScheme, legacy_schemes=(WerkzeugScheme,)):
+        self.pool = pool
+        self.cost = cost
+        self.scheme = scheme
+        self.schemes = (scheme,) + tuple(legacy_schemes)
+
+    def identify(self, hashed):
+        for scheme in self.schemes:
+            if hashed and scheme.identify(hashed):
+                return scheme
+        return None
+
+    def describe(self, hashed):
+        scheme = self.identify(hashed)
+        if scheme is None:
+            return None
+        return {"algorithm": scheme.name, "cost": scheme.cost(hashed)}
+
+    def hash(self, password):
+        return self.scheme.hash(self.pool, password, self.cost)
+
+    def hash_many(self, passwords):
+        return self.scheme.hash_many(self.pool, passwords, self.cost)
+
+    def verify(self, password, hashed):
+        scheme = self.identify(hashed)
+        if scheme is None or password is None:
+            return False
+        return scheme.verify(self.pool, password, hashed)
+
+    def needs_rehash(self, hashed):
+        scheme = self.identify(hashed)
+        return scheme is not self.scheme or scheme.cost(hashed) != self.cost
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from flask import jsonify
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the bcrypt pool has no free slot; surfaced as HTTP 429."""
+
+
+def _hashpw(password, rounds):
+    started = time.perf_counter()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+    return hashed, time.perf_counter() - started
+
+
+def _checkpw(password, hashed):
+    started = time.perf_counter()
+    matched = bcrypt.checkpw(password, hashed)
+    return matched, time.perf_counter() - started
+
+
+class BcryptPool:
+    """Runs bcrypt work off the request thread with a bounded backlog.
+
+    ``kind`` is ``"thread"`` (bcrypt releases the GIL), ``"process"`` or
+    ``"inline"`` to hash on the calling thread as before. At most
+    ``max_queue`` calls may be running or waiting; a caller that cannot get
+    a slot within ``acquire_timeout`` seconds gets ``HashingPoolSaturated``.
+    """
+
+    def __init__(self, kind='thread', workers=None, max_queue=64, acquire_timeout=0.5):
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def _get_executor(self):
+        # Created lazily so that pre-forking servers start one pool per worker.
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == 'process':
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        return self._executor
+
+    def run(self, fn, *args):
+        """Run ``fn(*args)``, which must return ``(result, seconds_spent)``."""
+        if self.kind == 'inline':
+            result, spent = fn(*args)
+            with self._lock:
+                self.completed += 1
+                self.hash_seconds += spent
+            return result
+
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolSaturated()
+        try:
+            with self._lock:
+                self.in_flight += 1
+            submitted = time.perf_counter()
+            result, spent = self._get_executor().submit(fn, *args).result()
+            total = time.perf_counter() - submitted
+            with self._lock:
+                self.completed += 1
+                self.hash_seconds += spent
+                self.wait_seconds += max(total - spent, 0.0)
+            return result
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def run_many(self, fn, args_list):
+        """Run ``fn`` over ``args_list`` in parallel, returning results in order.
+
+        Meant for batch jobs: instead of failing fast it waits for slots, but
+        keeps at most ``workers`` calls outstanding so the rest of the queue
+        stays available to interactive requests.
+        """
+        if self.kind == 'inline':
+            return [self.run(fn, *args) for args in args_list]
+
+        window = threading.BoundedSemaphore(self.workers)
+        executor = self._get_executor()
+        futures = []
+
+        def finished(future, submitted):
+            elapsed = time.perf_counter() - submitted
+            with self._lock:
+                self.in_flight -= 1
+                if future.exception() is None:
+                    spent = future.result()[1]
+                    self.completed += 1
+                    self.hash_seconds += spent
+                    self.wait_seconds += max(elapsed - spent, 0.0)
+            self._slots.release()
+            window.release()
+
+        for args in args_list:
+            window.acquire()
+            self._slots.acquire()
+            with self._lock:
+                self.in_flight += 1
+            submitted = time.perf_counter()
+            future = executor.submit(fn, *args)
+            future.add_done_callback(lambda f, submitted=submitted: finished(f, submitted))
+            futures.append(future)
+        return [future.result()[0] for future in futures]
+
+    def hash(self, password, rounds=12):
+        return self.run(_hashpw, password, rounds)
+
+    def hash_many(self, passwords, rounds=12):
+        return self.run_many(_hashpw, [(password, rounds) for password in passwords])
+
+    def check(self, password, hashed):
+        return self.run(_checkpw, password, hashed)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "hash_seconds_total": round(self.hash_seconds, 6),
+                "avg_wait_ms": round(self.wait_seconds / self.completed * 1000, 3) if self.completed else 0.0,
+                "avg_hash_ms": round(self.hash_seconds / self.completed * 1000, 3) if self.completed else 0.0
+            }
+
+
+def saturated_response(e):
+    return jsonify({"error": "Too many concurrent password operations, please retry"}), 429, {"Retry-After": "1"}
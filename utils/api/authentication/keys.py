@@ -0,0 +1,89 @@
+import base64
+import hashlib
+import json
+import os
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+
+def _b64url_uint(value):
+    raw = value.to_bytes((value.bit_length() + 7) // 8, 'big')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _public_jwk(public_key):
+    numbers = public_key.public_numbers()
+    return {"kty": "RSA", "n": _b64url_uint(numbers.n), "e": _b64url_uint(numbers.e)}
+
+
+def thumbprint(public_key):
+    """RFC 7638 JWK thumbprint, used as the kid when none is configured."""
+    canonical = json.dumps(_public_jwk(public_key), sort_keys=True, separators=(',', ':'))
+    digest = hashlib.sha256(canonical.encode('utf-8')).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+
+
+class KeyManager:
+    """Parsed, cached RSA keys for signing and verifying JWTs.
+
+    The key pair from JWT_PRIVATE_KEY / JWT_PUBLIC_KEY is always loaded.
+    JWT_KEYS_DIR may hold more keys for rotation: ``<kid>.pem`` is a public
+    key accepted for verification and ``<kid>.key.pem`` a private key that
+    can sign once JWT_ACTIVE_KID names it. Every token carries the ``kid``
+    of the key that signed it, and all public keys are published as a JWKS.
+    """
+
+    def __init__(self):
+        self.signing_kid = None
+        self.default_kid = None
+        self.private_keys = {}
+        self.public_keys = {}
+
+    def init_app(self, app, jwt):
+        private_key = load_pem_private_key(app.config['JWT_PRIVATE_KEY'].encode('utf-8'), password=None)
+        public_key = load_pem_public_key(app.config['JWT_PUBLIC_KEY'].encode('utf-8'))
+        self.default_kid = app.config.get('JWT_KEY_ID') or thumbprint(public_key)
+        self.private_keys[self.default_kid] = private_key
+        self.public_keys[self.default_kid] = public_key
+
+        keys_dir = app.config.get('JWT_KEYS_DIR')
+        if keys_dir:
+            for filename in sorted(os.listdir(keys_dir)):
+                path = os.path.join(keys_dir, filename)
+                with open(path, 'rb') as f:
+                    pem = f.read()
+                if filename.endswith('.key.pem'):
+                    kid = filename[:-len('.key.pem')]
+                    self.private_keys[kid] = load_pem_private_key(pem, password=None)
+                    self.public_keys.setdefault(kid, self.private_keys[kid].public_key())
+                elif filename.endswith('.pem'):
+                    self.public_keys[filename[:-len('.pem')]] = load_pem_public_key(pem)
+
+        self.signing_kid = app.config.get('JWT_ACTIVE_KID') or self.default_kid
+        if self.signing_kid not in self.private_keys:
+            raise RuntimeError(f"No private key loaded for JWT_ACTIVE_KID '{self.signing_kid}'")
+
+        jwt.encode_key_loader(self.signing_key)
+        jwt.decode_key_loader(self.verification_key)
+        jwt.additional_headers_loader(self.headers)
+
+    def signing_key(self, identity):
+        return self.private_keys[self.signing_kid]
+
+    def headers(self, identity):
+        return {"kid": self.signing_kid}
+
+    def verification_key(self, jwt_header, jwt_data):
+        # Tokens issued before kid headers existed were signed with the default key.
+        kid = jwt_header.get('kid', self.default_kid)
+        return self.public_keys.get(kid, self.public_keys[self.default_kid])
+
+    def jwks(self):
+        return {
+            "keys": [
+                {**_public_jwk(key), "kid": kid, "use": "sig", "alg": "RS256"}
+                for kid, key in self.public_keys.items()
+            ]
+        }
+
+
+key_manager = KeyManager()
@@ -0,0 +1,105 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from utils.schema.models import db, TokenBlacklist
+
+
+def _compact(jti):
+    # 16 bytes per UUID jti instead of a 36 character string.
+    try:
+        return uuid.UUID(jti).bytes
+    except (ValueError, TypeError, AttributeError):
+        return jti
+
+
+class RevokedTokenSet:
+    """Process-local copy of the revoked JTIs, kept fresh by delta sync.
+
+    Every ``sync_interval`` seconds the first request to notice pulls the
+    token_blacklist rows changed since the last sync (revoked JTIs and
+    identity-wide cutoffs) and drops entries whose tokens have expired.
+    Checks between syncs never touch the database.
+
+    Staleness window: a token revoked through another process is still
+    accepted here for up to ``sync_interval`` seconds. Revocations made in
+    this process apply immediately.
+    """
+
+    def __init__(self, sync_interval=30, overlap=60):
+        self.sync_interval = sync_interval
+        self.overlap = timedelta(seconds=overlap)
+        self._jtis = {}      # compact jti -> epoch expiry
+        self._cutoffs = {}   # identity -> (cutoff datetime, epoch expiry)
+        self._watermark = None
+        self._last_sync = None
+        self._lock = threading.Lock()
+        self.syncs = 0
+
+    def add(self, jti, exp):
+        self._jtis[_compact(jti)] = exp
+
+    def add_cutoff(self, identity, cutoff, exp):
+        identity = str(identity)
+        current = self._cutoffs.get(identity)
+        if current is None or current[0] < cutoff:
+            self._cutoffs[identity] = (cutoff, exp)
+
+    def is_revoked(self, jwt_payload):
+        self.maybe_sync()
+        if _compact(jwt_payload['jti']) in self._jtis:
+            return True
+        cutoff = self._cutoffs.get(str(jwt_payload.get('sub')))
+        if cutoff is None:
+            return False
+        # iat is whole seconds, so compare against the second of the cutoff.
+        return cutoff[0].replace(microsecond=0) > datetime.utcfromtimestamp(jwt_payload.get('iat', 0))
+
+    def maybe_sync(self):
+        if self._last_sync is not None and time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        # One request syncs; the others keep answering from the current copy.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self.sync()
+        finally:
+            self._lock.release()
+
+    def sync(self):
+        now = datetime.utcnow()
+        query = select(
+            TokenBlacklist.jti, TokenBlacklist.token_type, TokenBlacklist.user_identity,
+            TokenBlacklist.expires, TokenBlacklist.epoch_expires,
+            TokenBlacklist.created_at, TokenBlacklist.updated_at
+        ).where(TokenBlacklist.revoked.is_(True), TokenBlacklist.expires > now)
+        if self._watermark is not None:
+            # Re-read a little history so rows committed late are not missed.
+            query = query.where(TokenBlacklist.updated_at >= self._watermark - self.overlap)
+
+        watermark = self._watermark
+        for row in db.session.execute(query):
+            exp = row.epoch_expires or int((row.expires - datetime(1970, 1, 1)).total_seconds())
+            if row.token_type == 'all':
+                self.add_cutoff(row.user_identity, row.created_at, exp)
+            else:
+                self.add(row.jti, exp)
+            if watermark is None or row.updated_at > watermark:
+                watermark = row.updated_at
+        self._watermark = watermark or now
+
+        epoch_now = int(time.time())
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > epoch_now}
+        self._cutoffs = {key: value for key, value in self._cutoffs.items() if value[1] > epoch_now}
+        self._last_sync = time.monotonic()
+        self.syncs += 1
+
+    def stats(self):
+        return {
+            "revoked_jtis": len(self._jtis),
+            "identity_cutoffs": len(self._cutoffs),
+            "sync_interval": self.sync_interval,
+            "syncs": self.syncs,
+            "watermark": self._watermark.isoformat() if self._watermark else None
+        }
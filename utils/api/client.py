@@ -1,7 +1,7 @@
 # utils/routes/client_routes.py
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt
 
 from utils.controllers import (
     get_all_clients,
@@ -9,8 +9,13 @@ from utils.controllers import (
     login_client,
     update_client_logic,
     delete_client_logic,
-    get_all_clients_by_id
+    get_all_clients_by_id,
+    stream_clients,
+    get_client_tree,
+    patch_client
 )
+from utils.instrumentation import statement_budget
+from utils.http_cache import cached_response, if_match_version, versioned
 
 client_bp = Blueprint('client', __name__, url_prefix='/client')
 
@@ -18,13 +23,40 @@ client_bp = Blueprint('client', __name__, url_prefix='/client')
 @client_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_all_clients_route():
+    # ?format=ndjson (or Accept: application/x-ndjson) / ?format=stream
+    # stream the caller's clients instead of building the whole list.
+    fmt = request.args.get('format')
+    if fmt is None and request.accept_mimetypes.best == 'application/x-ndjson':
+        fmt = 'ndjson'
+    if fmt in ('ndjson', 'stream'):
+        company_id = get_jwt().get('company_id')
+        if not company_id:
+            return jsonify({"error": "Company ID not found in token"}), 400
+        chunked_json = fmt == 'stream'
+        return Response(
+            stream_with_context(stream_clients(company_id, chunked_json=chunked_json)),
+            mimetype='application/json' if chunked_json else 'application/x-ndjson'
+        )
+
     response, status_code = get_all_clients()
     return jsonify(response), status_code
 
 @client_bp.route('/<int:client_id>', methods=['GET'])
 @jwt_required()
+@cached_response('client', 'client_id')
 def get_client_by_id(client_id):
     response, status_code = get_all_clients_by_id(client_id)
+    return versioned('client', client_id, response, status_code, 'client')
+
+# Client with its projects and tasks
+@client_bp.route('/<int:client_id>/tree', methods=['GET'])
+@jwt_required()
+@statement_budget(3)
+def get_client_tree_route(client_id):
+    company_id = get_jwt().get('company_id')
+    if not company_id:
+        return jsonify({"error": "Company ID not found in token"}), 400
+    response, status_code = get_client_tree(client_id, company_id)
     return jsonify(response), status_code
 
 # Register new client
@@ -61,8 +93,19 @@ def client_login():
 @jwt_required()
 def update_client(client_id):
     data = request.get_json()
-    response, status = update_client_logic(client_id, data)
-    return jsonify(response), status
+    response, status = update_client_logic(client_id, data, expected_version=if_match_version('client', client_id))
+    return versioned('client', client_id, response, status, 'client')
+
+# Partially update client
+@client_bp.route('/<int:client_id>', methods=['PATCH'])
+@jwt_required()
+def patch_client_route(client_id):
+    company_id = get_jwt().get('company_id')
+    if not company_id:
+        return jsonify({"error": "Company ID not found in token"}), 400
+    response, status = patch_client(client_id, company_id, request.get_json(silent=True),
+                                    expected_version=if_match_version('client', client_id))
+    return versioned('client', client_id, response, status, 'client')
 
 # Delete client
 @client_bp.route('/delete/<int:client_id>', methods=['DELETE'])
@@ -4,11 +4,12 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.security import check_password_hash
 from utils.schema.models import db, Company
-from utils.controllers import register_company,update_company_details
+from utils.controllers import register_company,update_company_details,find_company_login,store_rehashed_password
 from utils.api.authentication.auth_helper import passwordHelper, AccessTokens, jwt
 from flask_jwt_extended import create_access_token,create_refresh_token,get_jwt
 from utils.schema.models import User
 from utils.schema.models import UserRole
+from utils.http_cache import cached_response, if_match_version, versioned
 
 company_bp = Blueprint('company', __name__, url_prefix='/company')
 
@@ -34,24 +35,26 @@ def company_login():
     if not contact_email or not password:
         return jsonify({"error": "Email and password are required"}), 400
 
-    company = Company.query.filter_by(contact_email=contact_email).first()
+    company = find_company_login(contact_email)
     
     if not company:
         return jsonify({"error": "Invalid email or password"}), 401
 
     try:
-        if not passwordHelper.check_password(company.password, password):
+        matched, new_hash = passwordHelper.verify_and_update(password, company.password)
+        if not matched:
             return jsonify({"error": "Invalid email or password"}), 401
     except (TypeError, ValueError) as e:
         return jsonify({"error": "Password verification failed", "details": str(e)}), 500
+    if new_hash:
+        store_rehashed_password(Company, company.id, new_hash)
 
-    user = User.query.filter_by(company_id=company.id).first()
-    if not user:
+    if company.first_name is None:
         return jsonify({"error": "No user found for this company"}), 404
 
     additional_claims = {
         "company_id": company.id,
-        "role": user.role.name,  
+        "role": company.role.name,  
         "email": company.contact_email
     }
 
@@ -59,8 +62,8 @@ def company_login():
     refresh_token = AccessTokens.create_refresh_token(identity=str(company.id),additional_claims=additional_claims)
 
     return jsonify({
-        "first_name": user.first_name,
-        "last_name": user.last_name,
+        "first_name": company.first_name,
+        "last_name": company.last_name,
         "message": "Login successful",
         "access_token": access_token,
         "refresh_token": refresh_token
@@ -95,7 +98,8 @@ def update_company(company_id):
             email_domain=data.get('email_domain'),
             contact_email=data.get('contact_email'),
             contact_number=data.get('contact_number'),
-            address=data.get('address')
+            address=data.get('address'),
+            expected_version=if_match_version('company', company_id)
         )
         
     except Exception as e:
@@ -104,6 +108,7 @@ def update_company(company_id):
 # Get Company Info
 @company_bp.route("/profile", methods=['GET'])
 @jwt_required()
+@cached_response('company')
 def get_company():
     try:
         # Get company_id directly from JWT claims
@@ -117,14 +122,15 @@ def get_company():
         if not company:
             return jsonify({"error": "Company not found"}), 404
 
-        return jsonify({
+        return versioned('company', company.id, {
             "company_id": company.id,
             "name": company.name,
             "email_domain": company.email_domain,
             "contact_email": company.contact_email,
             "contact_number": company.contact_number,
-            "address": company.address
-        }), 200
+            "address": company.address,
+            "version": company.version_id
+        }, 200)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,13 +1,15 @@
 # utils/routes/project_routes.py
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt
 from utils.controllers import (
     create_project,
     get_projects_by_client,
     update_project_logic,
-    delete_project_logic
+    delete_project_logic,
+    patch_project
 )
+from utils.http_cache import cached_response, if_match_version, versioned
 
 project_bp = Blueprint('project', __name__, url_prefix='/projects')
 
@@ -22,6 +24,7 @@ def create_new_project():
 # Get all active projects for a specific client
 @project_bp.route('/active/<int:client_id>', methods=['GET'])
 @jwt_required()
+@cached_response('projects_by_client', 'client_id')
 def get_client_projects(client_id):
     return get_projects_by_client(client_id)
 
@@ -30,8 +33,19 @@ def get_client_projects(client_id):
 @jwt_required()
 def update_project(project_id):
     data = request.get_json()
-    response, status_code = update_project_logic(project_id, data)
-    return jsonify(response), status_code
+    response, status_code = update_project_logic(project_id, data, expected_version=if_match_version('project', project_id))
+    return versioned('project', project_id, response, status_code, 'project')
+
+# Partially update a project
+@project_bp.route('/<int:project_id>', methods=['PATCH'])
+@jwt_required()
+def patch_project_route(project_id):
+    company_id = get_jwt().get('company_id')
+    if not company_id:
+        return jsonify({"error": "Company ID not found in token"}), 400
+    response, status_code = patch_project(project_id, company_id, request.get_json(silent=True),
+                                          expected_version=if_match_version('project', project_id))
+    return versioned('project', project_id, response, status_code, 'project')
 
 # Delete a project
 @project_bp.route('/<int:project_id>', methods=['DELETE'])
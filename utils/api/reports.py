@@ -0,0 +1,81 @@
+from datetime import datetime
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
+from flask_jwt_extended import jwt_required, get_jwt
+from utils.schema.models import db, Client
+from utils.reporting import utilization_report, REPORT_GROUPS, REPORT_PERIODS
+from utils.billing import stream_billing
+from utils.timesheet_workflow import is_manager
+
+reports_bp = Blueprint('reports', __name__, url_prefix='/reports')
+
+
+def _date_range():
+    """Parse ?from=&to= into dates; returns (date_from, date_to, error)."""
+    try:
+        date_from = datetime.strptime(request.args['from'], '%Y-%m-%d').date()
+        date_to = datetime.strptime(request.args['to'], '%Y-%m-%d').date()
+    except KeyError:
+        return None, None, {"error": "from and to are required", "example": "?from=2024-01-01&to=2024-03-31"}
+    except ValueError:
+        return None, None, {"error": "Invalid date format. Use YYYY-MM-DD"}
+    if date_from > date_to:
+        return None, None, {"error": "from must not be after to"}
+    return date_from, date_to, None
+
+
+# Approved time per user, project or client, by week or month
+@reports_bp.route('/utilization', methods=['GET'])
+@jwt_required()
+def utilization():
+    claims = get_jwt()
+    company_id = claims.get('company_id')
+    if not company_id:
+        return jsonify({"error": "Company ID not found in token"}), 400
+    if not is_manager(claims):
+        return jsonify({"error": "Manager or admin role required"}), 403
+
+    group_by = request.args.get('group_by', 'user')
+    granularity = request.args.get('granularity', 'week')
+    if group_by not in REPORT_GROUPS:
+        return jsonify({"error": f"group_by must be one of {sorted(REPORT_GROUPS)}"}), 400
+    if granularity not in REPORT_PERIODS:
+        return jsonify({"error": f"granularity must be one of {sorted(REPORT_PERIODS)}"}), 400
+
+    date_from, date_to, error = _date_range()
+    if error:
+        return jsonify(error), 400
+
+    rows = utilization_report(company_id, group_by, granularity, date_from, date_to)
+    return jsonify({
+        "group_by": group_by,
+        "granularity": granularity,
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "rows": rows
+    }), 200
+
+
+# Billable line items for one client, streamed as NDJSON and ending with a totals line
+@reports_bp.route('/billing/<int:client_id>', methods=['GET'])
+@jwt_required()
+def client_billing(client_id):
+    claims = get_jwt()
+    company_id = claims.get('company_id')
+    if not company_id:
+        return jsonify({"error": "Company ID not found in token"}), 400
+    if not is_manager(claims):
+        return jsonify({"error": "Manager or admin role required"}), 403
+
+    date_from, date_to, error = _date_range()
+    if error:
+        return jsonify(error), 400
+    if not Client.query.filter_by(id=client_id, company_id=company_id).first():
+        return jsonify({"error": "Client not found"}), 404
+
+    batch_size = current_app.config.get('BILLING_BATCH_SIZE', 1000)
+    return Response(
+        stream_with_context(stream_billing(
+            db.session.connection(), client_id, date_from, date_to, batch_size
+        )),
+        mimetype='application/x-ndjson'
+    )
@@ -1,18 +1,21 @@
 # utils/routes/task_routes.py
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt
 from utils.controllers import (
     create_task,
     get_task_by_id,
     update_task,
-    delete_task
+    delete_task,
+    patch_task
 )
+from utils.http_cache import cached_response, if_match_version, versioned
 
 task_bp = Blueprint('tasks', __name__, url_prefix='/tasks')
 
 # Create Task
 @task_bp.route('/', methods=['POST'])
+@jwt_required()
 def register_task():
     data = request.get_json()
     required_fields = ['project_id', 'name', 'code', 'billable', 'start_date', 'end_date']
@@ -32,16 +35,33 @@ def register_task():
 
 # Get Task by ID
 @task_bp.route('/<int:task_id>', methods=['GET'])
+@jwt_required()
+@cached_response('task', 'task_id')
 def get_task(task_id):
-    return get_task_by_id(task_id)
+    response, status_code = get_task_by_id(task_id)
+    return versioned('task', task_id, response, status_code)
 
 # Update Task
 @task_bp.route('/<int:task_id>', methods=['PUT'])
+@jwt_required()
 def update_task_route(task_id):
     data = request.get_json()
-    return update_task(task_id, data)
+    response, status_code = update_task(task_id, data, expected_version=if_match_version('task', task_id))
+    return versioned('task', task_id, response, status_code)
+
+# Partially update Task
+@task_bp.route('/<int:task_id>', methods=['PATCH'])
+@jwt_required()
+def patch_task_route(task_id):
+    company_id = get_jwt().get('company_id')
+    if not company_id:
+        return jsonify({"error": "Company ID not found in token"}), 400
+    response, status_code = patch_task(task_id, company_id, request.get_json(silent=True),
+                                       expected_version=if_match_version('task', task_id))
+    return versioned('task', task_id, response, status_code, 'task')
 
 # Delete Task
 @task_bp.route('/<int:task_id>', methods=['DELETE'])
+@jwt_required()
 def delete_task_route(task_id):
     return delete_task(task_id)
@@ -1,8 +1,9 @@
 # utils/routes/timesheet_routes.py
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
-from utils.controllers import create_timesheet
+from flask_jwt_extended import jwt_required, get_jwt
+from utils.controllers import create_timesheet, upsert_timesheet_entries, get_timesheet_entries, create_week_timesheets
+from utils.timesheet_workflow import apply_transition
 
 timesheet_bp = Blueprint('timesheets', __name__, url_prefix='/timesheets')
 
@@ -24,3 +25,58 @@ def create_timesheet_route():
         user_id=data['user_id'],  
         week_start=data['week_start']
     )
+
+
+# Create the week's timesheets for every user in the caller's company
+@timesheet_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def create_week_timesheets_route():
+    data = request.get_json() or {}
+    company_id = get_jwt().get('company_id')
+    if not company_id:
+        return jsonify({"error": "Company ID not found in token"}), 400
+    if 'week_start' not in data:
+        return jsonify({"error": "week_start is required", "example_request": {"week_start": "2023-06-12"}}), 400
+
+    response, status_code = create_week_timesheets(data['week_start'], company_id)
+    return jsonify(response), status_code
+
+
+# Save a week of entries
+@timesheet_bp.route('/<int:timesheet_id>/entries', methods=['PUT'])
+@jwt_required()
+def save_timesheet_entries(timesheet_id):
+    response, status_code = upsert_timesheet_entries(timesheet_id, get_jwt().get('company_id'), request.get_json())
+    return jsonify(response), status_code
+
+
+# Get entries for a timesheet
+@timesheet_bp.route('/<int:timesheet_id>/entries', methods=['GET'])
+@jwt_required()
+def list_timesheet_entries(timesheet_id):
+    response, status_code = get_timesheet_entries(timesheet_id, get_jwt().get('company_id'))
+    return jsonify(response), status_code
+
+
+# Submit / approve / reject / recall many timesheets at once
+@timesheet_bp.route('/bulk/<action>', methods=['POST'])
+@jwt_required()
+def bulk_transition(action):
+    data = request.get_json() or {}
+    response, status_code = apply_transition(action, data.get('ids'), get_jwt(), reason=data.get('reason'))
+    return jsonify(response), status_code
+
+
+# Submit / approve / reject / recall one timesheet
+@timesheet_bp.route('/<int:timesheet_id>/<action>', methods=['POST'])
+@jwt_required()
+def transition(timesheet_id, action):
+    data = request.get_json(silent=True) or {}
+    response, status_code = apply_transition(action, [timesheet_id], get_jwt(), reason=data.get('reason'))
+    if status_code == 200 and response['skipped']:
+        reason = response['skipped'][0]['reason']
+        # Another company's sheet is indistinguishable from a missing one.
+        if reason == 'not found':
+            return jsonify({"error": "Timesheet not found"}), 404
+        return jsonify({"error": f"Cannot {action} timesheet: {reason}"}), 409
+    return jsonify(response), status_code
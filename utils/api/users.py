@@ -1,16 +1,27 @@
 # utils/routes/user_routes.py
 
-from flask import Blueprint, request, jsonify
+import base64
+import csv
+import io
+import json
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt
 from utils.controllers import (
-    register_user, login_user, update_user_logic, delete_user_logic
+    register_user, login_user, update_user_logic, delete_user_logic, bulk_import_users, get_user_timesheets,
+    version_conflict, patch_user
 )
+from utils.instrumentation import statement_budget
+from utils.http_cache import cached_response, response_cache, if_match_version, versioned
 from utils.schema.models import User, TokenBlacklist, Company
 
 from utils.schema.models import db
+from utils.tenancy import SKIP_TENANT_SCOPE
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
 from flask_jwt_extended import create_access_token, create_refresh_token
-from utils.api.authentication.auth_helper import passwordHelper, AccessTokens
+from utils.api.authentication.auth_helper import passwordHelper, AccessTokens, revocation_cache
+from utils.api.authentication.hashing_pool import HashingPoolSaturated
 from datetime import datetime
 user_bp = Blueprint('user', __name__, url_prefix='/user')
 
@@ -36,7 +47,9 @@ def signup():
             return jsonify({"error": "Company ID required"}), 400
 
         # Check for existing user
-        if User.query.filter_by(email=data['email']).first():
+        # Emails are unique across companies; look past the tenant scope.
+        existing = User.query.filter_by(email=data['email']).execution_options(**{SKIP_TENANT_SCOPE: True})
+        if existing.first():
             return jsonify({"error": "Email already exists"}), 400
 
         # Verify company exists
@@ -72,6 +85,9 @@ def signup():
             }
         }), 201
 
+    except HashingPoolSaturated:
+        db.session.rollback()
+        raise
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"error": "Database error", "details": str(e)}), 500
@@ -79,6 +95,39 @@ def signup():
         db.session.rollback()
         return jsonify({"error": "Unexpected error", "details": str(e)}), 500
 
+# --- Bulk User Import ---
+@user_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def bulk_import():
+    """Import users from a CSV (text/csv) or JSON Lines body."""
+    claims = get_jwt()
+    if AccessTokens.is_token_revoked(claims):
+        return jsonify({'message': 'Token revoked, please login again'}), 401
+
+    company_id = claims.get('company_id')
+    if not company_id:
+        return jsonify({"error": "Company ID not found in token"}), 400
+
+    body = request.get_data(as_text=True)
+    try:
+        if request.mimetype == 'text/csv':
+            rows = list(csv.DictReader(io.StringIO(body)))
+        else:
+            rows = [json.loads(line) for line in body.splitlines() if line.strip()]
+    except (ValueError, csv.Error) as e:
+        return jsonify({"error": f"Could not parse upload: {str(e)}"}), 400
+
+    if not rows:
+        return jsonify({"error": "No rows to import"}), 400
+    max_rows = current_app.config['USER_IMPORT_MAX_ROWS']
+    if len(rows) > max_rows:
+        return jsonify({"error": f"At most {max_rows} rows per import"}), 413
+
+    response, status = bulk_import_users(
+        company_id, rows, chunk_size=current_app.config['USER_IMPORT_CHUNK_SIZE']
+    )
+    return jsonify(response), status
+
 # --- User Login ---
 @user_bp.route('/login', methods=['POST'])
 def login():
@@ -104,7 +153,6 @@ def login():
     }
 
     access_token = AccessTokens.create_access_token(identity=identity, additional_claims=additional_claims)
-    print(f"Access Token: {access_token}")
     refresh_token = AccessTokens.create_refresh_token(identity=identity, additional_claims=additional_claims)
 
     return jsonify({
@@ -115,9 +163,35 @@ def login():
     }), 200
 
 # --- Get All Users in Company ---
+USER_LIST_FIELDS = ('id', 'first_name', 'last_name', 'email', 'phone', 'role', 'company_id', 'created_at')
+
+
+def _encode_cursor(last_id):
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    return int(json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))["id"])
+
+
+def _serialize_user_field(name, value):
+    if name == 'role':
+        return value.value if hasattr(value, 'value') else value
+    if name == 'created_at':
+        return value.isoformat() if value else None
+    return value
+
+
 @user_bp.route('/all', methods=['GET'])
 @jwt_required()
 def get_users():
+    """List the company's users.
+
+    With ``limit``, ``cursor`` or ``fields`` in the query string the list
+    is paginated by keyset on (company_id, id) and returned as
+    ``{"users": [...], "next_cursor": ...}``; ``next_cursor`` is null on
+    the last page. Without them the full list is returned as before.
+    """
     try:
         jwt_data = get_jwt()
         company_id = jwt_data.get('company_id')
@@ -125,23 +199,61 @@ def get_users():
         if not company_id:
             return jsonify({"error": "Company ID not found in token"}), 400
 
-        users = User.query.filter_by(company_id=company_id).all()
+        if not any(param in request.args for param in ('limit', 'cursor', 'fields')):
+            users = User.query.filter_by(company_id=company_id).all()
 
-        users_list = [{
-            "id": user.id,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "email": user.email,
-            "phone": user.phone,
-            "role": user.role.value,
-            "company_id": user.company_id,
-            "created_at": user.created_at.isoformat()
-        } for user in users]
+            users_list = [{
+                "id": user.id,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "email": user.email,
+                "phone": user.phone,
+                "role": user.role.value,
+                "company_id": user.company_id,
+                "created_at": user.created_at.isoformat()
+            } for user in users]
+
+            return jsonify(users_list), 200
+
+        fields = USER_LIST_FIELDS
+        if request.args.get('fields'):
+            fields = tuple(field.strip() for field in request.args['fields'].split(',') if field.strip())
+            unknown = [field for field in fields if field not in USER_LIST_FIELDS]
+            if unknown:
+                return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+        # The id is needed to build the cursor even when not requested.
+        columns = [getattr(User, field) for field in dict.fromkeys(('id',) + fields)]
+
+        max_limit = current_app.config['USER_PAGE_SIZE_MAX']
+        try:
+            limit = min(int(request.args.get('limit', current_app.config['USER_PAGE_SIZE'])), max_limit)
+            after_id = _decode_cursor(request.args['cursor']) if request.args.get('cursor') else 0
+        except (ValueError, KeyError, TypeError):
+            return jsonify({"error": "Invalid limit or cursor"}), 400
+        if limit < 1:
+            return jsonify({"error": "limit must be positive"}), 400
+
+        rows = db.session.execute(
+            select(*columns)
+            .where(User.company_id == company_id, User.id > after_id)
+            .order_by(User.id)
+            .limit(limit + 1)
+        ).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        users_list = [
+            {field: _serialize_user_field(field, getattr(row, field)) for field in fields}
+            for row in rows
+        ]
 
-        return jsonify(users_list), 200
+        return jsonify({
+            "users": users_list,
+            "next_cursor": _encode_cursor(rows[-1].id) if has_more else None
+        }), 200
 
     except Exception as e:
-        print(f"Error in get_users: {e}")
+        current_app.logger.exception("Error in get_users")
         return jsonify({"error": "Internal server error"}), 500
 
 # --- Update User ---
@@ -162,6 +274,10 @@ def update_user(user_id):
         if not user:
             return jsonify({"error": "User not found or unauthorized"}), 404
 
+        expected_version = if_match_version('user', user_id)
+        if expected_version is not None and user.version_id != expected_version:
+            return versioned('user', user_id, *version_conflict("User", user.version_id))
+
         # Prepare update data with audit info
         update_data = {
             **data,
@@ -190,8 +306,9 @@ def update_user(user_id):
             user.password = update_data['password']
 
         db.session.commit()
+        response_cache.invalidate('user', user_id)
 
-        return jsonify({
+        return versioned('user', user_id, {
             "message": "User updated successfully",
             "user": {
                 "id": user.id,
@@ -202,10 +319,17 @@ def update_user(user_id):
                 "role": user.role.name if hasattr(user.role, 'name') else user.role,
                 "company_id": user.company_id,
                 "updated_by": update_data['updated_by'],
-                "updated_at": datetime.utcnow().isoformat()
+                "updated_at": datetime.utcnow().isoformat(),
+                "version": user.version_id
             }
-        }), 200
+        }, 200, 'user')
 
+    except HashingPoolSaturated:
+        db.session.rollback()
+        raise
+    except StaleDataError:
+        db.session.rollback()
+        return versioned('user', user_id, *version_conflict("User"))
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"error": f"Database error: {str(e)}"}), 500
@@ -230,18 +354,21 @@ def delete_user(user_id):
         if claims.get('company_id') != user.company_id:
             return jsonify({"error": "Unauthorized to delete this user"}), 403
         
-        tokens = TokenBlacklist.query.filter_by(user_identity=str(user.id)).all()
-        for token in tokens:
-            token.revoked = True
+        AccessTokens.revoke_identity(user.id)
         
         db.session.delete(user)
         db.session.commit()
+        revocation_cache.invalidate_identity(user_id)
+        response_cache.invalidate('user', user_id)
         
         return jsonify({
             "message": "User deleted and all tokens revoked successfully",
             "deleted_user_id": user_id
         }), 200
     
+    except StaleDataError:
+        db.session.rollback()
+        return versioned('user', user_id, *version_conflict("User"))
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"error": f"Database error: {str(e)}"}), 500
@@ -252,17 +379,41 @@ def delete_user(user_id):
 
 
 
+# --- Partially Update User ---
+@user_bp.route('/<int:user_id>', methods=['PATCH'])
+@jwt_required()
+def patch_user_route(user_id):
+    claims = get_jwt()
+    if AccessTokens.is_token_revoked(claims):
+        return jsonify({'message': 'Token revoked, please login again'}), 401
+    company_id = claims.get('company_id')
+    if not company_id:
+        return jsonify({"error": "Company ID not found in token"}), 400
+    response, status_code = patch_user(user_id, company_id, request.get_json(silent=True),
+                                       expected_version=if_match_version('user', user_id))
+    return versioned('user', user_id, response, status_code, 'user')
+
+
+# User with their timesheets; ?entries=true adds each sheet's entries
+@user_bp.route('/<int:user_id>/timesheets', methods=['GET'])
+@jwt_required()
+@statement_budget(3)
+def get_user_timesheets_route(user_id):
+    company_id = get_jwt().get('company_id')
+    if not company_id:
+        return jsonify({"error": "Company ID not found in token"}), 400
+    include_entries = request.args.get('entries', '').lower() in ('1', 'true', 'yes')
+    response, status_code = get_user_timesheets(user_id, company_id, include_entries)
+    return jsonify(response), status_code
+
+
 @user_bp.route('/<int:user_id>', methods=['GET'])
 @jwt_required()
+@cached_response('user', 'user_id')
 def get_user(user_id):
     try:
-        # Debug: Print token contents
-        jwt_data = get_jwt()
-        print("JWT DATA:", jwt_data)
-        
         # Get user by ID only
         user = User.query.get(user_id)
-        print("User found:", user)
 
         if not user:
             return jsonify({
@@ -278,13 +429,14 @@ def get_user(user_id):
             "phone": user.phone,
             "role": user.role.value if hasattr(user.role, 'value') else user.role,
             "company_id": user.company_id,
-            "created_at": user.created_at.isoformat() if user.created_at else None
+            "created_at": user.created_at.isoformat() if user.created_at else None,
+            "version": user.version_id
         }
 
-        return jsonify(user_data), 200
+        return versioned('user', user_id, user_data, 200)
 
     except Exception as e:
-        print(f"Error in get_user: {e}")
+        current_app.logger.exception("Error in get_user")
         return jsonify({
             "error": "Internal server error",
             "details": str(e)
@@ -0,0 +1,164 @@
+import json
+import multiprocessing
+import os
+from decimal import Decimal, ROUND_HALF_UP
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sqlalchemy import create_engine, select, func
+from .schema.models import Timesheet, TimesheetEntry, TimesheetStatus, Task, Project, Client
+from .reporting import billable_condition
+
+CENT = Decimal('0.01')
+
+
+def billing_statement(client_id, date_from, date_to):
+    """Billable line items for one client: one row per project, task and user.
+
+    The whole computation is a single grouped aggregation over approved
+    time; Python only prices and formats the rows that come back.
+    """
+    minutes = func.sum(TimesheetEntry.minutes)
+    return (
+        select(
+            Project.id.label('project_id'), Project.code.label('project_code'),
+            Task.id.label('task_id'), Task.code.label('task_code'),
+            Timesheet.user_id.label('user_id'),
+            Project.employee_rate.label('rate'),
+            minutes.label('minutes')
+        )
+        .select_from(TimesheetEntry)
+        .join(Timesheet, Timesheet.id == TimesheetEntry.timesheet_id)
+        .join(Task, Task.id == TimesheetEntry.task_id)
+        .join(Project, Project.id == Task.project_id)
+        .where(
+            Project.client_id == client_id,
+            Timesheet.status == TimesheetStatus.APPROVED,
+            TimesheetEntry.work_date >= date_from,
+            TimesheetEntry.work_date <= date_to,
+            billable_condition()
+        )
+        .group_by(Project.id, Project.code, Project.employee_rate, Task.id, Task.code, Timesheet.user_id)
+        .order_by(Project.id, Task.id, Timesheet.user_id)
+    )
+
+
+def _money(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _line_item(row):
+    # Priced in Decimal and rounded half up to the cent; amounts are
+    # serialized as strings so JSON clients never see a binary float.
+    amount = _money(Decimal(int(row.minutes)) * Decimal(str(row.rate)) / 60)
+    return {
+        "project_id": row.project_id,
+        "project_code": row.project_code,
+        "task_id": row.task_id,
+        "task_code": row.task_code,
+        "user_id": row.user_id,
+        "minutes": int(row.minutes),
+        "hours": round(row.minutes / 60, 2),
+        "rate": row.rate,
+        "amount": str(amount)
+    }
+
+
+def billing_line_items(connection, client_id, date_from, date_to, batch_size=1000):
+    """Yield line item dicts, fetched ``batch_size`` rows at a time."""
+    result = connection.execute(
+        billing_statement(client_id, date_from, date_to).execution_options(yield_per=batch_size)
+    )
+    for row in result:
+        yield _line_item(row)
+
+
+def stream_billing(connection, client_id, date_from, date_to, batch_size=1000):
+    """Yield NDJSON: one line per line item, then a totals line."""
+    minutes = 0
+    amount = Decimal(0)
+    count = 0
+    for item in billing_line_items(connection, client_id, date_from, date_to, batch_size):
+        minutes += item["minutes"]
+        amount += Decimal(item["amount"])
+        count += 1
+        yield json.dumps({"type": "line_item", **item}) + '\n'
+    yield json.dumps(_totals(client_id, date_from, date_to, count, minutes, amount)) + '\n'
+
+
+def _totals(client_id, date_from, date_to, count, minutes, amount):
+    return {
+        "type": "totals",
+        "client_id": client_id,
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "line_items": count,
+        "minutes": minutes,
+        "hours": round(minutes / 60, 2),
+        "amount": str(_money(amount))
+    }
+
+
+# Each worker process opens its own engine; connections are never shared
+# across a fork.
+_worker_engine = None
+
+
+def _init_worker(database_uri):
+    global _worker_engine
+    _worker_engine = create_engine(database_uri)
+
+
+def _bill_client(client_id, date_from, date_to, batch_size, output_dir):
+    with _worker_engine.connect() as connection:
+        if output_dir is None:
+            minutes = 0
+            amount = Decimal(0)
+            count = 0
+            for item in billing_line_items(connection, client_id, date_from, date_to, batch_size):
+                minutes += item["minutes"]
+                amount += Decimal(item["amount"])
+                count += 1
+            return _totals(client_id, date_from, date_to, count, minutes, amount)
+
+        path = os.path.join(output_dir, f'client_{client_id}.ndjson')
+        with open(path, 'w') as out:
+            for line in stream_billing(connection, client_id, date_from, date_to, batch_size):
+                out.write(line)
+        totals = json.loads(line)
+        totals["output"] = path
+        return totals
+
+
+def run_billing(database_uri, client_ids, date_from, date_to, workers=None, batch_size=1000, output_dir=None):
+    """Bill every client in ``client_ids`` across worker processes.
+
+    Yields each client's totals as it finishes. With ``output_dir`` the
+    line items for each client are written to ``client_<id>.ndjson`` there.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(database_uri,)) as executor:
+        futures = [
+            executor.submit(_bill_client, client_id, date_from, date_to, batch_size, output_dir)
+            for client_id in client_ids
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def client_ids_with_billable_time(connection, date_from, date_to, company_id=None):
+    """Clients with approved time in the range."""
+    stmt = (
+        select(Project.client_id)
+        .join(Task, Task.project_id == Project.id)
+        .join(TimesheetEntry, TimesheetEntry.task_id == Task.id)
+        .join(Timesheet, Timesheet.id == TimesheetEntry.timesheet_id)
+        .where(
+            Timesheet.status == TimesheetStatus.APPROVED,
+            TimesheetEntry.work_date >= date_from,
+            TimesheetEntry.work_date <= date_to
+        )
+        .distinct()
+    )
+    if company_id is not None:
+        stmt = stmt.join(Client, Client.id == Project.client_id).where(Client.company_id == company_id)
+    return list(connection.execute(stmt).scalars())
@@ -0,0 +1,65 @@
+import json
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from .billing import run_billing, client_ids_with_billable_time
+from .controllers import create_week_timesheets
+from .reporting import rebuild_rollups
+from .schema.models import db
+from .tenancy import backfill_company_ids
+
+timesheets_cli = AppGroup('timesheets', help='Timesheet maintenance commands.')
+billing_cli = AppGroup('billing', help='Billing runs over approved time.')
+tenants_cli = AppGroup('tenants', help='Tenant data maintenance commands.')
+
+
+@timesheets_cli.command('create-week')
+@click.option('--week-start', required=True, help='Week start date, YYYY-MM-DD.')
+@click.option('--company-id', type=int, help='Only this company (default: every company).')
+def create_week(week_start, company_id):
+    """Create missing DRAFT timesheets for a week; safe to re-run."""
+    response, status_code = create_week_timesheets(week_start, company_id)
+    if status_code >= 400:
+        raise click.ClickException(response['error'])
+    click.echo(f"Created {response['created']} timesheets for week starting {response['week_start']}.")
+
+
+@timesheets_cli.command('rebuild-rollups')
+@click.option('--company-id', type=int, help='Only this company (default: every company).')
+def rebuild_rollups_command(company_id):
+    """Recompute utilization rollups from approved timesheets."""
+    count = rebuild_rollups(company_id)
+    db.session.commit()
+    click.echo(f"Rebuilt utilization rollups from {count} approved timesheets.")
+
+
+@billing_cli.command('run')
+@click.option('--from', 'date_from', required=True, type=click.DateTime(['%Y-%m-%d']), help='First day, YYYY-MM-DD.')
+@click.option('--to', 'date_to', required=True, type=click.DateTime(['%Y-%m-%d']), help='Last day, YYYY-MM-DD.')
+@click.option('--client-id', 'client_ids', type=int, multiple=True, help='Bill only these clients (repeatable).')
+@click.option('--company-id', type=int, help='Only clients of this company.')
+@click.option('--workers', type=int, help='Worker processes (default: BILLING_WORKERS, else CPU count).')
+@click.option('--output-dir', type=click.Path(file_okay=False, writable=True), help='Write line items per client here.')
+def billing_run(date_from, date_to, client_ids, company_id, workers, output_dir):
+    """Bill clients in parallel and print one JSON totals line per client."""
+    date_from, date_to = date_from.date(), date_to.date()
+    if workers is None:
+        workers = current_app.config.get('BILLING_WORKERS')
+    if not client_ids:
+        client_ids = client_ids_with_billable_time(db.session.connection(), date_from, date_to, company_id)
+        db.session.rollback()
+    database_uri = db.engine.url.render_as_string(hide_password=False)
+    for totals in run_billing(database_uri, client_ids, date_from, date_to, workers=workers,
+                              batch_size=current_app.config.get('BILLING_BATCH_SIZE', 1000), output_dir=output_dir):
+        click.echo(json.dumps(totals))
+
+
+@tenants_cli.command('backfill-company-id')
+@click.option('--batch-size', type=int, default=5000, show_default=True, help='Rows per id range and transaction.')
+@click.option('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+@click.option('--verbose', is_flag=True, help='Print every batch.')
+def backfill_company_id(batch_size, pause, verbose):
+    """Copy company_id onto projects, tasks and timesheets; safe to re-run."""
+    updated = backfill_company_ids(batch_size, pause, echo=click.echo if verbose else None)
+    for table, count in updated.items():
+        click.echo(f"{table}: {count} rows updated")
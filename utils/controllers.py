@@ -1,9 +1,16 @@
-from .schema.models import db, Company, User , Client, Project,Task,Timesheet,Role
-from datetime import datetime
+from .schema.models import db, Company, User , Client, Project,Task,Timesheet,Role,TimesheetEntry
+from .sql import upsert_insert
+from .tenancy import company_filter, SKIP_TENANT_SCOPE
+from .http_cache import response_cache
+from datetime import date, datetime
 from werkzeug.security import generate_password_hash,check_password_hash
+from sqlalchemy import select, update, insert, func, literal
+from sqlalchemy.orm import selectinload, raiseload
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.exc import IntegrityError,SQLAlchemyError
 from enum import Enum 
-from flask import jsonify
+import json
+from flask import jsonify, current_app
 from flask_jwt_extended import create_access_token, create_refresh_token
 from utils.api.authentication.auth_helper import passwordHelper
 from utils.api.authentication.auth_helper import AccessTokens
@@ -19,7 +26,9 @@ def register_user(first_name, last_name, email, password, company_id, role, phon
         if not all([first_name, last_name, email, password, company_id, role]):
             return {"error": "Missing required fields"}, 400
 
-        if User.query.filter_by(email=email).first():
+        # Emails, client codes, project codes and task codes are unique across
+        # all companies, so these checks must see every tenant's rows.
+        if User.query.filter_by(email=email).execution_options(**{SKIP_TENANT_SCOPE: True}).first():
             return {"error": "Email already exists"}, 400
 
         if not Company.query.get(company_id):
@@ -35,7 +44,7 @@ def register_user(first_name, last_name, email, password, company_id, role, phon
             phone=phone,
             role=role,
             company_id=company_id,
-            password=generate_password_hash(password)
+            password=passwordHelper.hash_password(password)
         )
 
         db.session.add(new_user)
@@ -43,15 +52,59 @@ def register_user(first_name, last_name, email, password, company_id, role, phon
 
         return {"message": "User registered successfully", "user_id": new_user.id}, 201
 
+    except ValueError as e:
+        db.session.rollback()
+        return {"error": str(e)}, 400
     except IntegrityError as e:
         db.session.rollback()
         return {"error": "Database error", "details": str(e)}, 500
 
+def find_login_user(email):
+    """Fetch only what a login needs for ``email`` in a single round trip.
+
+    Served from the ix_users1_email_login covering index. Returns a Row, or
+    None when no user has that email.
+    """
+    return db.session.execute(
+        select(
+            User.id, User.password, User.first_name, User.last_name,
+            User.email, User.company_id, User.role
+        ).where(User.email == email)
+    ).first()
+
+
+def find_company_login(contact_email):
+    """Fetch a company's credentials and its first user in one query.
+
+    User columns are None when the company has no users yet.
+    """
+    return db.session.execute(
+        select(
+            Company.id, Company.password, Company.contact_email,
+            User.first_name, User.last_name, User.role
+        )
+        .outerjoin(User, User.company_id == Company.id)
+        .where(Company.contact_email == contact_email)
+        .order_by(Company.id, User.id)
+        .limit(1)
+    ).first()
+
+
+def store_rehashed_password(model, row_id, new_hash):
+    db.session.execute(update(model).where(model.id == row_id).values(password=new_hash))
+    db.session.commit()
+
+
 def login_user(email, password):
-    user = User.query.filter_by(email=email).first()
+    user = find_login_user(email)
+    if not user:
+        return {"error": "Invalid credentials"}, 401
 
-    if not user or not check_password_hash(user.password, password):
+    matched, new_hash = passwordHelper.verify_and_update(password, user.password)
+    if not matched:
         return {"error": "Invalid credentials"}, 401
+    if new_hash:
+        store_rehashed_password(User, user.id, new_hash)
 
     return {
         "user": {
@@ -64,6 +117,99 @@ def login_user(email, password):
         }
     }, 200
 
+def _parse_role(value):
+    if isinstance(value, UserRole):
+        return value
+    try:
+        return UserRole[str(value).upper()]
+    except KeyError:
+        return UserRole(str(value).lower())
+
+
+def bulk_import_users(company_id, rows, chunk_size=500):
+    """Create many users for one company and report the outcome per row.
+
+    Email collisions are found with one query for the whole batch,
+    passwords are hashed in parallel on the bcrypt pool and valid rows are
+    inserted ``chunk_size`` at a time, one transaction per chunk. A chunk
+    that fails is rolled back and its rows are reported as errors; earlier
+    chunks stay committed.
+    """
+    if not Company.query.get(company_id):
+        return {"error": "Company not found"}, 404
+
+    required_fields = ['first_name', 'last_name', 'email', 'password', 'role']
+    results = []
+    pending = []
+    seen_emails = set()
+    for number, row in enumerate(rows, start=1):
+        result = {"row": number, "email": row.get('email') if isinstance(row, dict) else None}
+        results.append(result)
+        if not isinstance(row, dict) or not all(row.get(field) for field in required_fields):
+            result.update(status="error", error="Missing required fields")
+            continue
+        wrong_type = [field for field in ('first_name', 'last_name', 'email', 'password', 'phone')
+                      if row.get(field) is not None and not isinstance(row[field], str)]
+        if wrong_type:
+            result.update(status="error", error=f"Fields must be strings: {', '.join(wrong_type)}")
+            continue
+        try:
+            role = _parse_role(row['role'])
+        except ValueError:
+            result.update(status="error", error=f"Invalid role '{row['role']}'")
+            continue
+        if row['email'] in seen_emails:
+            result.update(status="error", error="Duplicate email in upload")
+            continue
+        seen_emails.add(row['email'])
+        pending.append((result, row, role))
+
+    if pending:
+        existing = set(db.session.execute(
+            select(User.email).where(User.email.in_([row['email'] for _, row, _ in pending]))
+            .execution_options(**{SKIP_TENANT_SCOPE: True})
+        ).scalars())
+        for result, row, _ in pending:
+            if row['email'] in existing:
+                result.update(status="error", error="Email already exists")
+        pending = [item for item in pending if item[1]['email'] not in existing]
+
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        hashes = passwordHelper.hash_passwords([row['password'] for _, row, _ in chunk])
+        now = datetime.utcnow()
+        values = [{
+            'company_id': company_id,
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'email': row['email'],
+            'phone': row.get('phone') or None,
+            'password': hashed,
+            'role': role,
+            'created_at': now
+        } for (_, row, role), hashed in zip(chunk, hashes)]
+        try:
+            created = db.session.execute(insert(User).returning(User.id, User.email), values).all()
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            for result, _, _ in chunk:
+                result.update(status="error", error=f"Database error: {e.__class__.__name__}")
+            continue
+        ids = {email: user_id for user_id, email in created}
+        for result, row, _ in chunk:
+            result.update(status="created", id=ids.get(row['email']))
+
+    created_count = sum(1 for result in results if result.get('status') == 'created')
+    return {
+        "message": "Bulk import finished",
+        "total": len(results),
+        "created": created_count,
+        "failed": len(results) - created_count,
+        "results": results
+    }, 200
+
+
 def register_company(name, industry, email_domain, contact_email, 
                     contact_number,password, address=None): #code
     try:
@@ -131,9 +277,12 @@ def register_company(name, industry, email_domain, contact_email,
             }
         }), 201
 
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except IntegrityError as e:
         db.session.rollback()
-        print(e)
+        current_app.logger.exception("Company registration failed")
         return jsonify({
             "error": "Database error occurred",
             "details": str(e)
@@ -143,7 +292,8 @@ def register_company(name, industry, email_domain, contact_email,
 def register_client(name, code, company_id, description):
     try:
         # Check for existing client with the same code
-        existing_client = Client.query.filter_by(code=code).first()
+        existing_client = (Client.query.filter_by(code=code)
+                           .execution_options(**{SKIP_TENANT_SCOPE: True}).first())
         if existing_client:
             return {"error": "Client with this code already exists"}, 400
 
@@ -172,18 +322,18 @@ def register_client(name, code, company_id, description):
 
     except IntegrityError:
         db.session.rollback()
-        print(e)
+        current_app.logger.exception("Client registration failed")
 
         return {"error": "Integrity error: possible duplicate or foreign key violation"}, 500
 
     except SQLAlchemyError as e:
         db.session.rollback()
-        print(e)
+        current_app.logger.exception("Client registration failed")
         
         return {"error": f"Database error: {str(e)}"}, 500
 
     except Exception as e:
-        print(e)
+        current_app.logger.exception("Client registration failed")
         db.session.rollback()
         return {"error": f"Unexpected error: {str(e)}"}, 500
     
@@ -235,12 +385,14 @@ def create_project(data):
     if not client:
         return {"error": "Client not found"}, 404
 
-    existing_project = Project.query.filter_by(code=data['code']).first()
+    existing_project = (Project.query.filter_by(code=data['code'])
+                        .execution_options(**{SKIP_TENANT_SCOPE: True}).first())
     if existing_project:
         return {"error": "Project with this code already exists"}, 400
 
     new_project = Project(
         client_id=data['client_id'],
+        company_id=client.company_id,
         name=data['name'],
         code=data['code'],
         start_date=datetime.strptime(data['start_date'], '%Y-%m-%d'),
@@ -253,6 +405,7 @@ def create_project(data):
     try:
         db.session.add(new_project)
         db.session.commit()
+        response_cache.invalidate('projects_by_client', new_project.client_id)
         
         return {
             "message": "Project created successfully",
@@ -273,12 +426,18 @@ def create_project(data):
     
 
 def create_task(project_id, name, code, billable, start_date, end_date, description):
-    existing_task = Task.query.filter_by(code=code).first()
+    project = Project.query.get(project_id)
+    if not project:
+        return {"error": "Project not found"}, 404
+
+    existing_task = (Task.query.filter_by(code=code)
+                     .execution_options(**{SKIP_TENANT_SCOPE: True}).first())
     if existing_task:
         return {"error": "Task with this code already exists"}, 400
 
     new_task = Task(
         project_id=project_id,
+        company_id=project.company_id if project.company_id is not None else project.client.company_id,
         name=name,
         code=code,
         billable=billable,
@@ -311,7 +470,8 @@ def create_task(project_id, name, code, billable, start_date, end_date, descript
 def create_timesheet(user_id, week_start):
     try:
         from .schema.models import User  
-        if not User.query.get(user_id):
+        user = User.query.get(user_id)
+        if not user:
             return {"error": "User not found"}, 404
 
         
@@ -322,6 +482,7 @@ def create_timesheet(user_id, week_start):
 
         new_timesheet = Timesheet(
             user_id=user_id,
+            company_id=user.company_id,
             week_start=week_start_date,
             status=TimesheetStatus.DRAFT
         )
@@ -341,17 +502,200 @@ def create_timesheet(user_id, week_start):
 
     except ValueError:
         return {"error": "Invalid date format. Use YYYY-MM-DD"}, 400
+    except IntegrityError:
+        db.session.rollback()
+        return {"error": "Timesheet exists for this week"}, 409
     except Exception as e:
         db.session.rollback()
         return {"error": str(e)}, 500
 
 
-def update_company_details(company_id, name, email_domain, contact_email, contact_number, address):
+def create_week_timesheets(week_start, company_id=None):
+    """Create the missing DRAFT timesheets for ``week_start`` in one statement.
+
+    Covers every user of ``company_id``, or of all companies when it is
+    None. Users that already have a sheet for the week are skipped by the
+    uq_timesheets_user_week index, so concurrent runs are safe.
+    """
+    try:
+        week_start_date = datetime.strptime(week_start, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        return {"error": "Invalid date format. Use YYYY-MM-DD"}, 400
+
+    now = datetime.utcnow()
+    users = select(
+        User.id,
+        User.company_id,
+        literal(week_start_date, Timesheet.week_start.type),
+        literal(TimesheetStatus.DRAFT, Timesheet.status.type),
+        literal(now, Timesheet.created_at.type),
+        literal(now, Timesheet.updated_at.type)
+    )
+    if company_id is not None:
+        users = users.where(User.company_id == company_id)
+    else:
+        # Always true, but SQLite needs a WHERE to parse INSERT ... SELECT ... ON CONFLICT.
+        users = users.where(User.company_id.isnot(None))
+
+    stmt = upsert_insert(Timesheet).from_select(
+        ['user_id', 'company_id', 'week_start', 'status', 'created_at', 'updated_at'], users
+    ).on_conflict_do_nothing(index_elements=['user_id', 'week_start'])
+
+    try:
+        result = db.session.execute(stmt)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return {"error": f"Database error: {str(e)}"}, 500
+
+    return {
+        "message": "Timesheets created",
+        "week_start": week_start_date.isoformat(),
+        "created": result.rowcount
+    }, 201
+
+
+EDITABLE_TIMESHEET_STATUSES = (TimesheetStatus.DRAFT, TimesheetStatus.REJECTED, TimesheetStatus.RECALLED)
+
+
+def _company_timesheet(timesheet_id, company_id):
+    return db.session.execute(
+        select(Timesheet).where(Timesheet.id == timesheet_id, company_filter(Timesheet, company_id))
+    ).scalar_one_or_none()
+
+
+def _parse_timesheet_entries(timesheet, data):
+    """Turn an ``entries`` list or a ``grid`` of 7 daily values into rows."""
+    week = [timesheet.week_start + timedelta(days=offset) for offset in range(7)]
+    raw = []
+    if 'grid' in data:
+        for line in data['grid']:
+            minutes = line.get('minutes')
+            if not isinstance(minutes, list) or len(minutes) != 7:
+                raise ValueError("Each grid line needs task_id and 7 daily minute values")
+            raw.extend((line.get('task_id'), day, value) for day, value in zip(week, minutes))
+    else:
+        for entry in data.get('entries', []):
+            work_date = datetime.strptime(entry.get('work_date', ''), '%Y-%m-%d').date()
+            raw.append((entry.get('task_id'), work_date, entry.get('minutes')))
+
+    rows = {}
+    for task_id, work_date, minutes in raw:
+        # bool is an int subclass; true/false are not minutes or ids.
+        if (not isinstance(task_id, int) or not isinstance(minutes, int)
+                or isinstance(task_id, bool) or isinstance(minutes, bool)):
+            raise ValueError("task_id and minutes must be integers")
+        if work_date not in week:
+            raise ValueError(f"{work_date.isoformat()} is outside the week starting {timesheet.week_start.isoformat()}")
+        if not 0 <= minutes <= 1440:
+            raise ValueError("minutes must be between 0 and 1440")
+        # One row per cell: ON CONFLICT cannot touch the same row twice.
+        rows[(task_id, work_date)] = minutes
+    return rows
+
+
+def upsert_timesheet_entries(timesheet_id, company_id, data):
+    """Write a week of entries for one timesheet in a single statement."""
+    timesheet = _company_timesheet(timesheet_id, company_id)
+    if not timesheet:
+        return {"error": "Timesheet not found"}, 404
+    if timesheet.status not in EDITABLE_TIMESHEET_STATUSES:
+        return {"error": f"Timesheet is {timesheet.status.value} and cannot be edited"}, 409
+
+    try:
+        rows = _parse_timesheet_entries(timesheet, data or {})
+    except (ValueError, TypeError, AttributeError) as e:
+        return {"error": str(e)}, 400
+    if not rows:
+        return {"error": "No entries provided"}, 400
+
+    task_ids = {task_id for task_id, _ in rows}
+    known_tasks = set(db.session.execute(
+        select(Task.id).where(Task.id.in_(task_ids), company_filter(Task, company_id))
+    ).scalars())
+    unknown = sorted(task_ids - known_tasks)
+    if unknown:
+        return {"error": "Unknown tasks", "task_ids": unknown}, 400
+
+    now = datetime.utcnow()
+    stmt = upsert_insert(TimesheetEntry).values([{
+        "timesheet_id": timesheet.id,
+        "task_id": task_id,
+        "work_date": work_date,
+        "minutes": minutes,
+        "created_at": now,
+        "updated_at": now
+    } for (task_id, work_date), minutes in rows.items()])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['timesheet_id', 'task_id', 'work_date'],
+        set_={"minutes": stmt.excluded.minutes, "updated_at": stmt.excluded.updated_at}
+    )
+    try:
+        db.session.execute(stmt)
+        # Cleared cells are not kept; an absent row means zero minutes.
+        db.session.execute(
+            TimesheetEntry.__table__.delete().where(
+                TimesheetEntry.timesheet_id == timesheet.id, TimesheetEntry.minutes == 0
+            )
+        )
+        timesheet.updated_at = now
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return {"error": f"Database error: {str(e)}"}, 500
+
+    total = db.session.execute(
+        select(func.coalesce(func.sum(TimesheetEntry.minutes), 0)).where(TimesheetEntry.timesheet_id == timesheet.id)
+    ).scalar()
+    return {
+        "message": "Timesheet entries saved",
+        "timesheet_id": timesheet.id,
+        "entries_written": len(rows),
+        "total_minutes": total
+    }, 200
+
+
+def get_timesheet_entries(timesheet_id, company_id):
+    timesheet = _company_timesheet(timesheet_id, company_id)
+    if not timesheet:
+        return {"error": "Timesheet not found"}, 404
+
+    entries = db.session.execute(
+        select(TimesheetEntry.task_id, TimesheetEntry.work_date, TimesheetEntry.minutes)
+        .where(TimesheetEntry.timesheet_id == timesheet.id)
+        .order_by(TimesheetEntry.task_id, TimesheetEntry.work_date)
+    ).all()
+    return {
+        "timesheet_id": timesheet.id,
+        "week_start": timesheet.week_start.isoformat(),
+        "status": timesheet.status.value,
+        "entries": [{
+            "task_id": entry.task_id,
+            "work_date": entry.work_date.isoformat(),
+            "minutes": entry.minutes
+        } for entry in entries],
+        "total_minutes": sum(entry.minutes for entry in entries)
+    }, 200
+
+
+def version_conflict(entity, version=None):
+    """409 for a write based on an out-of-date version_id."""
+    return {
+        "error": f"{entity} was changed by another request; reload it and retry",
+        "version": version
+    }, 409
+
+
+def update_company_details(company_id, name, email_domain, contact_email, contact_number, address,
+                           expected_version=None):
     try:
         company = Company.query.get(company_id)
 
         if not company:
             return jsonify({"error": "Company not found"}), 404
+        if expected_version is not None and company.version_id != expected_version:
+            response, status = version_conflict("Company", company.version_id)
+            return jsonify(response), status
 
         if email_domain:
             existing = Company.query.filter(
@@ -372,6 +716,7 @@ def update_company_details(company_id, name, email_domain, contact_email, contac
             company.address = address
 
         db.session.commit()
+        response_cache.invalidate('company', company_id)
 
         return jsonify({
             "message": "Company details updated successfully",
@@ -381,10 +726,15 @@ def update_company_details(company_id, name, email_domain, contact_email, contac
                 "email_domain": company.email_domain,
                 "contact_email": company.contact_email,
                 "contact_number": company.contact_number,
-                "address": company.address
+                "address": company.address,
+                "version": company.version_id
             }
         }), 200
-                
+
+    except StaleDataError:
+        db.session.rollback()
+        response, status = version_conflict("Company")
+        return jsonify(response), status
     except IntegrityError as e:
         db.session.rollback()
         return jsonify({
@@ -437,10 +787,12 @@ def get_projects_by_client(client_id):
     return jsonify(project_list), 200
 
 
-def update_client_logic(client_id, data):
+def update_client_logic(client_id, data, expected_version=None):
     client = Client.query.get(client_id)
     if not client:
         return {"error": "Client not found"}, 404
+    if expected_version is not None and client.version_id != expected_version:
+        return version_conflict("Client", client.version_id)
 
     try:
         if "name" in data:
@@ -449,6 +801,7 @@ def update_client_logic(client_id, data):
             client.description = data["description"]
         
         db.session.commit()
+        response_cache.invalidate('client', client_id)
         return {
             "message": "Client updated successfully",
             "client": {
@@ -456,9 +809,13 @@ def update_client_logic(client_id, data):
                 "name": client.name,
                 "code": client.code,
                 "company_id": client.company_id,
-                "description": client.description
+                "description": client.description,
+                "version": client.version_id
             }
         }, 200
+    except StaleDataError:
+        db.session.rollback()
+        return version_conflict("Client")
     except Exception as e:
         #print(e)
         db.session.rollback()
@@ -473,23 +830,31 @@ def delete_client_logic(client_id):
     try:
         db.session.delete(client)
         db.session.commit()
+        response_cache.invalidate('client', client_id)
+        response_cache.invalidate('projects_by_client', client_id)
         return {"message": "Client deleted successfully"}, 200
+    except StaleDataError:
+        db.session.rollback()
+        return version_conflict("Client")
     except Exception as e:
         db.session.rollback()
         return {"error": f"Delete failed: {str(e)}"}, 500
 
 
 
-def update_project_logic(project_id, data):
+def update_project_logic(project_id, data, expected_version=None):
     project = Project.query.get(project_id)
     if not project:
         return {"error": "Project not found"}, 404
+    if expected_version is not None and project.version_id != expected_version:
+        return version_conflict("Project", project.version_id)
 
     try:
         if 'name' in data:
             project.name = data['name']
         if 'code' in data:
-            existing_project = Project.query.filter_by(code=data['code']).first()
+            existing_project = (Project.query.filter_by(code=data['code'])
+                                .execution_options(**{SKIP_TENANT_SCOPE: True}).first())
             if existing_project and existing_project.id != project.id:
                 return {"error": "Project code already exists"}, 400
         project.code = data['code']
@@ -508,6 +873,7 @@ def update_project_logic(project_id, data):
                 return {"error": f"Invalid status '{data['status']}'"}, 400
 
         db.session.commit()
+        response_cache.invalidate('projects_by_client', project.client_id)
 
         return {
             "message": "Project updated successfully",
@@ -519,10 +885,14 @@ def update_project_logic(project_id, data):
                 "end_date": project.end_date.isoformat(),
                 "default_billable": project.default_billable,
                 "employee_rate": project.employee_rate,
-                "status": project.status.name
+                "status": project.status.name,
+                "version": project.version_id
             }
         }, 200
 
+    except StaleDataError:
+        db.session.rollback()
+        return version_conflict("Project")
     except Exception as e:
         db.session.rollback()
         return {"error": f"Failed to update project: {str(e)}"}, 500
@@ -533,11 +903,18 @@ def delete_project_logic(project_id):
         return {"error": "Project not found"}, 404
 
     try:
+        client_id = project.client_id
         Task.query.filter_by(project_id=project.id).delete()
         db.session.delete(project)
         db.session.commit()
+        response_cache.invalidate('projects_by_client', client_id)
+        # The task ids went with the bulk delete.
+        response_cache.invalidate('task')
         return {"message": "Project deleted successfully"}, 200
 
+    except StaleDataError:
+        db.session.rollback()
+        return version_conflict("Project")
     except Exception as e:
         db.session.rollback()
         return {"error": f"Failed to delete project: {str(e)}"}, 500
@@ -558,14 +935,17 @@ def get_task_by_id(task_id):
         "start_date": task.start_date.isoformat(),
         "end_date": task.end_date.isoformat(),
         "description": task.description,
-        "created_at": task.created_at.isoformat()
+        "created_at": task.created_at.isoformat(),
+        "version": task.version_id
     }, 200
 
 
-def update_task(task_id, data):
+def update_task(task_id, data, expected_version=None):
     task = Task.query.get(task_id)
     if not task:
         return {"error": "Task not found"}, 404
+    if expected_version is not None and task.version_id != expected_version:
+        return version_conflict("Task", task.version_id)
 
     try:
         task.name = data.get('name', task.name)
@@ -576,9 +956,13 @@ def update_task(task_id, data):
         task.description = data.get('description', task.description)
 
         db.session.commit()
+        response_cache.invalidate('task', task_id)
 
-        return {"message": "Task updated successfully"}, 200
+        return {"message": "Task updated successfully", "version": task.version_id}, 200
 
+    except StaleDataError:
+        db.session.rollback()
+        return version_conflict("Task")
     except Exception as e:
         db.session.rollback()
         return {"error": f"Failed to update task: {str(e)}"}, 500
@@ -592,17 +976,23 @@ def delete_task(task_id):
     try:
         db.session.delete(task)
         db.session.commit()
+        response_cache.invalidate('task', task_id)
         return {"message": "Task deleted successfully"}, 200
+    except StaleDataError:
+        db.session.rollback()
+        return version_conflict("Task")
     except Exception as e:
         db.session.rollback()
         return {"error": f"Failed to delete task: {str(e)}"}, 500
 
 
 
-def update_user_logic(user_id, data):
+def update_user_logic(user_id, data, expected_version=None):
     user = User.query.get(user_id)
     if not user:
         return {"error": "User not found"}, 404
+    if expected_version is not None and user.version_id != expected_version:
+        return version_conflict("User", user.version_id)
 
     try:
         if "first_name" in data:
@@ -617,6 +1007,7 @@ def update_user_logic(user_id, data):
             user.role = data["role"]
 
         db.session.commit()
+        response_cache.invalidate('user', user_id)
 
         return {
             "message": "User updated successfully",
@@ -627,10 +1018,14 @@ def update_user_logic(user_id, data):
                 "email": user.email,
                 "phone": user.phone,
                 "role": user.role.name,
-                "company_id": user.company_id
+                "company_id": user.company_id,
+                "version": user.version_id
             }
         }, 200
 
+    except StaleDataError:
+        db.session.rollback()
+        return version_conflict("User")
     except SQLAlchemyError as e:
         db.session.rollback()
         return {"error": f"Update failed: {str(e)}"}, 500
@@ -644,14 +1039,201 @@ def delete_user_logic(user_id):
     try:
         db.session.delete(user)
         db.session.commit()
+        response_cache.invalidate('user', user_id)
         return {"message": "User deleted successfully"}, 200
 
+    except StaleDataError:
+        db.session.rollback()
+        return version_conflict("User")
     except SQLAlchemyError as e:
         db.session.rollback()
         return {"error": f"Delete failed: {str(e)}"}, 500
-    
 
 
+def _text(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("must be a non-empty string")
+    return value
+
+
+def _optional_text(value):
+    if value is not None and not isinstance(value, str):
+        raise ValueError("must be a string or null")
+    return value
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError("must be a date in YYYY-MM-DD format")
+
+
+def _bool(value):
+    if not isinstance(value, bool):
+        raise ValueError("must be true or false")
+    return value
+
+
+def _rate(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError("must be a non-negative number")
+    return float(value)
+
+
+def _member(enum):
+    def parse(value):
+        try:
+            return enum[value.upper()]
+        except (AttributeError, KeyError):
+            raise ValueError(f"must be one of {', '.join(m.value for m in enum)}")
+    return parse
+
+
+# Columns each PATCH endpoint may set, with the parser that validates them.
+PATCH_FIELDS = {
+    Project: {
+        'name': _text, 'code': _text, 'start_date': _date, 'end_date': _date,
+        'default_billable': _bool, 'employee_rate': _rate, 'status': _member(ProjectStatus)
+    },
+    Task: {
+        'name': _text, 'code': _text, 'billable': _bool, 'start_date': _date, 'end_date': _date,
+        'description': _optional_text
+    },
+    Client: {'name': _text, 'description': _optional_text},
+    User: {
+        'first_name': _text, 'last_name': _text, 'email': _text, 'phone': _optional_text,
+        'role': _member(UserRole)
+    },
+}
+
+# What a PATCH response shows; password stays out of RETURNING.
+PATCH_RETURNING = {
+    Project: (Project.id, Project.client_id, Project.name, Project.code, Project.start_date, Project.end_date,
+              Project.default_billable, Project.employee_rate, Project.status),
+    Task: (Task.id, Task.project_id, Task.name, Task.code, Task.billable, Task.start_date, Task.end_date,
+           Task.description),
+    Client: (Client.id, Client.company_id, Client.name, Client.code, Client.description),
+    User: (User.id, User.company_id, User.first_name, User.last_name, User.email, User.phone, User.role),
+}
+
+
+def _patch_values(model, data):
+    if not isinstance(data, dict) or not data:
+        return None, ({"error": "Request body must be a non-empty JSON object"}, 400)
+
+    fields = PATCH_FIELDS[model]
+    unknown = sorted(set(data) - set(fields))
+    if unknown:
+        return None, ({"error": f"Unknown or read-only fields: {', '.join(unknown)}"}, 400)
+
+    values, errors = {}, {}
+    for key, value in data.items():
+        try:
+            values[key] = fields[key](value)
+        except ValueError as e:
+            errors[key] = str(e)
+    if 'start_date' in values and 'end_date' in values and values['start_date'] > values['end_date']:
+        errors['end_date'] = "must not be before start_date"
+    if errors:
+        return None, ({"error": "Invalid fields", "fields": errors}, 400)
+    return values, None
+
+
+def _patch_row(model, entity, row_id, company_id, data, expected_version=None):
+    """Apply a partial update with one UPDATE ... WHERE id AND company_id RETURNING.
+
+    Returns ``(row, None)`` with the RETURNING values as a dict, or
+    ``(None, (payload, status))``. A start_date or end_date sent alone is
+    checked against the stored other date in the same WHERE clause. Only a
+    miss costs a second query, to tell a missing row (404) from a stale
+    If-Match version (409) or an inverted date range (400).
+    """
+    values, error = _patch_values(model, data)
+    if error:
+        return None, error
+
+    if model in (Project, Task):
+        owned = company_filter(model, company_id)
+    else:
+        owned = model.company_id == company_id
+    stmt = (
+        update(model)
+        .where(model.id == row_id, owned)
+        .values(**values, version_id=model.version_id + 1)
+        .returning(*PATCH_RETURNING[model], model.version_id.label('version'))
+        # The WHERE clause already carries the tenant check.
+        .execution_options(synchronize_session=False, **{SKIP_TENANT_SCOPE: True})
+    )
+    if expected_version is not None:
+        stmt = stmt.where(model.version_id == expected_version)
+    if 'start_date' in values and 'end_date' not in values:
+        stmt = stmt.where(model.end_date >= values['start_date'])
+        date_error = {'start_date': "must not be after end_date"}
+    elif 'end_date' in values and 'start_date' not in values:
+        stmt = stmt.where(model.start_date <= values['end_date'])
+        date_error = {'end_date': "must not be before start_date"}
+    else:
+        date_error = None
+
+    try:
+        row = db.session.execute(stmt).mappings().first()
+        if row is None:
+            db.session.rollback()
+            current = db.session.execute(
+                select(model.version_id).where(model.id == row_id, owned)
+                .execution_options(**{SKIP_TENANT_SCOPE: True})
+            ).scalar()
+            if current is None:
+                return None, ({"error": f"{entity} not found"}, 404)
+            if date_error and expected_version in (None, current):
+                return None, ({"error": "Invalid fields", "fields": date_error}, 400)
+            return None, version_conflict(entity, current)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return None, ({"error": f"{entity} update rejected", "details": str(e.orig)}, 400)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return None, ({"error": f"Update failed: {str(e)}"}, 500)
+
+    return {
+        key: value.isoformat() if isinstance(value, date) else value.name if isinstance(value, Enum) else value
+        for key, value in row.items()
+    }, None
+
+
+def patch_project(project_id, company_id, data, expected_version=None):
+    project, error = _patch_row(Project, "Project", project_id, company_id, data, expected_version)
+    if error:
+        return error
+    response_cache.invalidate('projects_by_client', project['client_id'])
+    return {"message": "Project updated successfully", "project": project}, 200
+
+
+def patch_task(task_id, company_id, data, expected_version=None):
+    task, error = _patch_row(Task, "Task", task_id, company_id, data, expected_version)
+    if error:
+        return error
+    response_cache.invalidate('task', task_id)
+    return {"message": "Task updated successfully", "task": task}, 200
+
+
+def patch_client(client_id, company_id, data, expected_version=None):
+    client, error = _patch_row(Client, "Client", client_id, company_id, data, expected_version)
+    if error:
+        return error
+    response_cache.invalidate('client', client_id)
+    return {"message": "Client updated successfully", "client": client}, 200
+
+
+def patch_user(user_id, company_id, data, expected_version=None):
+    user, error = _patch_row(User, "User", user_id, company_id, data, expected_version)
+    if error:
+        return error
+    response_cache.invalidate('user', user_id)
+    return {"message": "User updated successfully", "user": user}, 200
+
 
 def get_all_clients():
     try:
@@ -675,13 +1257,130 @@ def get_all_clients():
         }, 200
 
     except SQLAlchemyError as e:
-        print(e)
+        current_app.logger.exception("Listing clients failed")
         return {"error": f"Database error: {str(e)}"}, 500
 
     except Exception as e:
-        print(e)
+        current_app.logger.exception("Listing clients failed")
         return {"error": f"Unexpected error: {str(e)}"}, 500
     
+def stream_clients(company_id, chunked_json=False, batch_size=500):
+    """Yield the company's clients as NDJSON lines, or as one JSON array.
+
+    Rows come from a server-side cursor ``batch_size`` at a time, so memory
+    use does not grow with the number of clients.
+    """
+    result = db.session.execute(
+        select(Client.id, Client.name, Client.code, Client.company_id, Client.description, Client.created_at)
+        .where(Client.company_id == company_id)
+        .order_by(Client.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if chunked_json:
+        yield '['
+    for index, client in enumerate(result):
+        line = json.dumps({
+            "id": client.id,
+            "name": client.name,
+            "code": client.code,
+            "company_id": client.company_id,
+            "description": client.description,
+            "status": 'Active',
+            "created_at": client.created_at.isoformat() if client.created_at else None
+        })
+        if chunked_json:
+            yield (',' if index else '') + line
+        else:
+            yield line + '\n'
+    if chunked_json:
+        yield ']'
+
+
+def get_client_tree(client_id, company_id):
+    """A client with its projects and their tasks in three statements.
+
+    ``raiseload('*')`` turns any relationship the serializer was not
+    meant to touch into an error instead of a silent extra query.
+    """
+    client = db.session.execute(
+        select(Client)
+        .where(Client.id == client_id, Client.company_id == company_id)
+        .options(selectinload(Client.projects).selectinload(Project.tasks), raiseload('*'))
+    ).scalar_one_or_none()
+    if not client:
+        return {"error": "Client not found"}, 404
+
+    return {
+        "id": client.id,
+        "name": client.name,
+        "code": client.code,
+        "company_id": client.company_id,
+        "description": client.description,
+        "created_at": client.created_at.isoformat() if client.created_at else None,
+        "projects": [{
+            "id": project.id,
+            "name": project.name,
+            "code": project.code,
+            "start_date": project.start_date.isoformat(),
+            "end_date": project.end_date.isoformat(),
+            "default_billable": project.default_billable,
+            "employee_rate": project.employee_rate,
+            "status": project.status.value,
+            "tasks": [{
+                "id": task.id,
+                "name": task.name,
+                "code": task.code,
+                "billable": task.billable,
+                "start_date": task.start_date.isoformat(),
+                "end_date": task.end_date.isoformat(),
+                "description": task.description
+            } for task in project.tasks]
+        } for project in client.projects]
+    }, 200
+
+
+def get_user_timesheets(user_id, company_id, include_entries=False):
+    """A user with their timesheets, optionally with each sheet's entries."""
+    timesheets = selectinload(User.timesheets)
+    if include_entries:
+        timesheets = timesheets.selectinload(Timesheet.entries)
+    user = db.session.execute(
+        select(User)
+        .where(User.id == user_id, User.company_id == company_id)
+        .options(timesheets, raiseload('*'))
+    ).scalar_one_or_none()
+    if not user:
+        return {"error": "User not found"}, 404
+
+    sheets = []
+    for timesheet in sorted(user.timesheets, key=lambda t: t.week_start, reverse=True):
+        sheet = {
+            "id": timesheet.id,
+            "week_start": timesheet.week_start.isoformat(),
+            "status": timesheet.status.value,
+            "submitted_at": timesheet.submitted_at.isoformat() if timesheet.submitted_at else None,
+            "approved_at": timesheet.approved_at.isoformat() if timesheet.approved_at else None
+        }
+        if include_entries:
+            sheet["entries"] = [{
+                "id": entry.id,
+                "task_id": entry.task_id,
+                "work_date": entry.work_date.isoformat(),
+                "minutes": entry.minutes
+            } for entry in sorted(timesheet.entries, key=lambda e: (e.work_date, e.task_id))]
+        sheets.append(sheet)
+
+    return {
+        "id": user.id,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "role": user.role.value if hasattr(user.role, 'value') else user.role,
+        "company_id": user.company_id,
+        "timesheets": sheets
+    }, 200
+
+
 def get_all_clients_by_id(client_id):
     try:
         client = Client.query.get(client_id)
@@ -695,7 +1394,8 @@ def get_all_clients_by_id(client_id):
             "company_id": client.company_id,
             "description": client.description,
             "status": client.status if hasattr(client, 'status') else 'Active', 
-            "created_at": client.created_at.isoformat() if client.created_at else None
+            "created_at": client.created_at.isoformat() if client.created_at else None,
+            "version": client.version_id
         }
 
         return {
@@ -704,10 +1404,10 @@ def get_all_clients_by_id(client_id):
         }, 200
 
     except SQLAlchemyError as e:
-        print(e)
+        current_app.logger.exception("Loading client failed")
         return {"error": f"Database error: {str(e)}"}, 500
 
     except Exception as e:
-        print(e)
+        current_app.logger.exception("Loading client failed")
         return {"error": f"Unexpected error: {str(e)}"}, 500
     
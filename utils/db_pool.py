@@ -0,0 +1,116 @@
+import threading
+from time import perf_counter
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, NullPool
+from .schema.models import db
+from .replicas import replica_router
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def wait_stats(self):
+        with self._wait_lock:
+            checkouts, timeouts, wait_total, wait_max = self.checkouts, self.timeouts, self.wait_total, self.wait_max
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_avg_ms": round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_max_ms": round(wait_max * 1000, 3)
+        }
+
+
+# Keyword arguments that stop psycopg 3 and asyncpg from preparing
+# statements server-side; PgBouncer in transaction pooling mode may hand
+# the next transaction to a backend that never saw the PREPARE.
+# psycopg2 never prepares server-side, so it needs none.
+_NO_PREPARE_CONNECT_ARGS = {
+    'psycopg': {'prepare_threshold': None},
+    'asyncpg': {'statement_cache_size': 0, 'prepared_statement_cache_size': 0},
+}
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings; unset ones keep library defaults."""
+    uri = config.get('SQLALCHEMY_DATABASE_URI') or ''
+    options = {}
+    if config.get('DB_POOL_CLASS') == 'null':
+        options['poolclass'] = NullPool
+    elif not uri.startswith('sqlite'):
+        options['poolclass'] = TimedQueuePool
+        for key, option in (('DB_POOL_SIZE', 'pool_size'), ('DB_MAX_OVERFLOW', 'max_overflow'),
+                            ('DB_POOL_TIMEOUT', 'pool_timeout'), ('DB_POOL_USE_LIFO', 'pool_use_lifo')):
+            if config.get(key) is not None:
+                options[option] = config[key]
+
+    if config.get('DB_POOL_RECYCLE') is not None:
+        options['pool_recycle'] = config['DB_POOL_RECYCLE']
+    if config.get('DB_POOL_PRE_PING') is not None:
+        options['pool_pre_ping'] = config['DB_POOL_PRE_PING']
+
+    if config.get('DB_PGBOUNCER'):
+        driver = uri.split('://', 1)[0].partition('+')[2]
+        connect_args = dict(_NO_PREPARE_CONNECT_ARGS.get(driver, {}))
+        if connect_args:
+            options['connect_args'] = connect_args
+    return options
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # Negative while the pool has not opened all of pool_size yet.
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout()
+        })
+    else:
+        stats["status"] = pool.status()
+    if isinstance(pool, TimedQueuePool):
+        stats.update(pool.wait_stats())
+    return stats
+
+
+db_pool_bp = Blueprint('db_pool', __name__)
+
+
+@db_pool_bp.route('/db/pool/stats', methods=['GET'])
+@jwt_required()
+def db_pool_stats():
+    return jsonify({name or 'default': pool_stats(engine) for name, engine in db.engines.items()}), 200
+
+
+@db_pool_bp.route('/db/replicas/stats', methods=['GET'])
+@jwt_required()
+def db_replica_stats():
+    return jsonify(replica_router.stats()), 200
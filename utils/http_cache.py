@@ -0,0 +1,204 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Blueprint, current_app, request, Response, jsonify
+from flask_jwt_extended import get_jwt, jwt_required
+
+
+class ResponseCache:
+    """LRU cache of serialized 200 responses with a TTL.
+
+    Keys are ``(namespace, object_id, company_id)`` so tenants never share
+    an entry. A response is stored under a token taken with ``begin`` before
+    it is computed; ``invalidate`` drops every entry for an object and
+    revokes the tokens still in flight for it, so a response computed before
+    the write cannot be stored after it. Each worker process has its own
+    cache and a write only invalidates the worker that handled it, so the
+    TTL defaults to 0 (off) and should only be raised for a single worker
+    or data that may be served stale for that long.
+    """
+
+    def __init__(self, maxsize=5000, ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('HTTP_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('HTTP_CACHE_TTL', self.ttl)
+        self.clear()
+
+    def begin(self, key):
+        """Reserve ``key`` for a response about to be computed."""
+        token = object()
+        with self._lock:
+            self._pending[token] = key
+        return token
+
+    def release(self, token):
+        with self._lock:
+            self._pending.pop(token, None)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token, value):
+        with self._lock:
+            key = self._pending.pop(token, None)
+            if key is None:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, namespace, object_id=None):
+        """Forget one object, or with ``object_id=None`` the whole namespace."""
+        with self._lock:
+            if object_id is None:
+                def matches(key):
+                    return key[0] == namespace
+            else:
+                def matches(key):
+                    return key[:2] == (namespace, object_id)
+            for token in [token for token, key in self._pending.items() if matches(key)]:
+                del self._pending[token]
+            for key in [key for key in self._entries if matches(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+response_cache = ResponseCache()
+
+
+def _etag(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def version_etag(namespace, object_id, version):
+    """The ETag of one row version, e.g. ``company-3-v2``.
+
+    It names the row as well as the version, so a tag from one tenant's
+    ``/company/profile`` never matches another tenant's.
+    """
+    return f'{namespace}-{object_id}-v{version}'
+
+
+def if_match_version(namespace, object_id):
+    """The row version named in the request's If-Match header, or None without one.
+
+    ``If-Match: *`` counts as no header. If-Match uses the strong
+    comparison, so weak tags are ignored. A tag for another row, or one
+    that is not a version tag at all, gives 0, which no row has, so the
+    write is refused.
+    """
+    if not request.if_match or request.if_match.star_tag:
+        return None
+    prefix = version_etag(namespace, object_id, '')
+    for tag in request.if_match.as_set():
+        if tag.startswith(prefix) and tag[len(prefix):].isdigit():
+            return int(tag[len(prefix):])
+    return 0
+
+
+def versioned(namespace, object_id, payload, status_code, key=None):
+    """jsonify a controller result, tagged with its row's ``version``.
+
+    The row is ``payload[key]`` when the controller nests it, and the
+    payload itself otherwise (as in a 409 from ``version_conflict``).
+    """
+    response = jsonify(payload)
+    response.status_code = status_code
+    version = payload.get(key, payload).get('version') if key else payload.get('version')
+    if version is not None:
+        response.set_etag(version_etag(namespace, object_id, version))
+    return response
+
+
+def cached_response(namespace, id_arg=None):
+    """Serve a JWT-protected GET view from ``response_cache`` with an ETag.
+
+    The object id is the view argument ``id_arg``, or the caller's company
+    when it is None. A matching If-None-Match gets a 304 without a body.
+    Place it under ``@jwt_required()``.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            company_id = get_jwt().get('company_id')
+            object_id = kwargs[id_arg] if id_arg else company_id
+            key = (namespace, object_id, company_id)
+
+            cached = response_cache.get(key) if response_cache.ttl > 0 else None
+            if cached is None:
+                token = response_cache.begin(key) if response_cache.ttl > 0 else None
+                try:
+                    response = current_app.make_response(fn(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    body = response.get_data()
+                    # Versioned rows tag themselves with their version_id.
+                    etag = response.get_etag()[0] or _etag(body)
+                    if token is not None:
+                        response_cache.set(token, (body, etag, response.mimetype))
+                finally:
+                    if token is not None:
+                        response_cache.release(token)
+                response.headers['X-Cache'] = 'miss'
+            else:
+                body, etag, mimetype = cached
+                response = Response(body, mimetype=mimetype)
+                response.headers['X-Cache'] = 'hit'
+
+            response.set_etag(etag)
+            # Tenant data: never in shared caches, and revalidate unless a
+            # max-age was configured.
+            response.cache_control.private = True
+            response.vary.add('Authorization')
+            max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 0)
+            if max_age:
+                response.cache_control.max_age = max_age
+            else:
+                response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+http_cache_bp = Blueprint('http_cache', __name__)
+
+
+@http_cache_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def http_cache_stats():
+    return jsonify(response_cache.stats()), 200
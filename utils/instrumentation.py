@@ -0,0 +1,138 @@
+import random
+from functools import wraps
+from time import perf_counter
+from flask import g, has_request_context, current_app, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from . import metrics
+
+
+class StatementBudgetExceeded(RuntimeError):
+    """A request, or a view marked with ``statement_budget``, ran too many SQL statements."""
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or 'sql_statements' not in g:
+        return
+    g.sql_statements += 1
+    if 'sql_seconds' in g:
+        conn.info.setdefault('instrumentation_started', []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or 'sql_seconds' not in g:
+        return
+    started = conn.info.get('instrumentation_started')
+    if started:
+        g.sql_seconds += perf_counter() - started.pop()
+    # psycopg2 reports the row count of a buffered SELECT; server-side
+    # cursors and some drivers report -1.
+    if cursor.rowcount and cursor.rowcount > 0:
+        g.sql_rows += cursor.rowcount
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so it does not shift every later timing on the connection.
+    if context.connection is None:
+        return
+    started = context.connection.info.get('instrumentation_started')
+    if started:
+        elapsed = perf_counter() - started.pop()
+        if has_request_context() and 'sql_seconds' in g:
+            g.sql_seconds += elapsed
+
+
+def _budget_mode():
+    # Off in production unless configured; tests fail loudly by default.
+    return current_app.config.get('SQL_STATEMENT_BUDGET_MODE') or ('raise' if current_app.testing else 'off')
+
+
+def _over_budget(what, count, budget):
+    message = f"{what} ran {count} SQL statements, budget is {budget}"
+    if _budget_mode() == 'raise':
+        raise StatementBudgetExceeded(message)
+    current_app.logger.warning(message)
+
+
+def statement_budget(budget):
+    """Cap the statements the wrapped view itself may run.
+
+    Place it under ``@jwt_required()`` so token checks are not counted.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not g.get('statement_budget'):
+                return fn(*args, **kwargs)
+            before = g.sql_statements
+            response = fn(*args, **kwargs)
+            count = g.sql_statements - before
+            if count > budget:
+                _over_budget(request.endpoint, count, budget)
+            return response
+        return wrapper
+    return decorator
+
+
+def _route():
+    # The URL rule, not the path, keeps label cardinality bounded.
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def init_app(app):
+    """Per-request metrics and the SQL statement budget.
+
+    Every request is counted and timed. A METRICS_SAMPLE_RATE fraction of
+    requests also records DB time, statements and rows through engine
+    events; unsampled requests skip the per-statement timing entirely.
+    With METRICS_ENDPOINT on, GET /metrics serves everything in the
+    Prometheus text format; it is unauthenticated, so it is off by default.
+
+    When SQL_STATEMENT_BUDGET_MODE is on, statements are counted on every
+    request, reported in ``X-SQL-Statements``, and requests above
+    SQL_STATEMENT_BUDGET (0 = no global ceiling) raise in ``raise`` mode
+    and are logged in ``warn`` mode.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def start_request_instrumentation():
+        g.request_started = perf_counter()
+        budget = _budget_mode() != 'off'
+        sampled = random.random() < current_app.config.get('METRICS_SAMPLE_RATE', 0)
+        if budget or sampled:
+            g.sql_statements = 0
+        g.statement_budget = budget
+        if sampled:
+            g.sql_seconds = 0.0
+            g.sql_rows = 0
+
+    @app.after_request
+    def finish_request_instrumentation(response):
+        if 'request_started' not in g:
+            return response
+        method, route = request.method, _route()
+        metrics.requests_total.inc(method, route, response.status_code)
+        metrics.request_seconds.observe(perf_counter() - g.request_started, method, route)
+        if 'sql_seconds' in g:
+            metrics.sampled_requests_total.inc(method, route)
+            metrics.db_seconds.observe(g.sql_seconds, method, route)
+            metrics.db_statements.observe(g.sql_statements, method, route)
+            metrics.db_rows.observe(g.sql_rows, method, route)
+
+        if g.statement_budget:
+            count = g.sql_statements
+            response.headers['X-SQL-Statements'] = str(count)
+            budget = current_app.config.get('SQL_STATEMENT_BUDGET')
+            if budget and count > budget:
+                _over_budget(request.endpoint, count, budget)
+        return response
+
+    if app.config.get('METRICS_ENDPOINT', False):
+        @app.route('/metrics')
+        def prometheus_metrics():
+            return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,229 @@
+import random
+import threading
+import time
+import jwt
+from flask import g, has_request_context, request, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.util import find_tables
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Reads that must never be stale: a revoked token has to stop working at once.
+PRIMARY_ONLY_TABLES = {'token_blacklist'}
+
+# Seconds the replica is behind the primary; 0 when it has replayed
+# everything it received (an idle primary sends nothing new to replay).
+PG_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+READ_AFTER_WRITE_COOKIE = 'primary_until'
+
+
+class ReplicaRouter:
+    """Sends reads of safe requests to a healthy, caught-up replica.
+
+    Replicas are Flask-SQLAlchemy binds named ``replica_<n>``. Each one is
+    health-checked at most every REPLICA_HEALTH_INTERVAL seconds on a
+    background thread started by whichever request finds the result
+    stale, so a dead replica never stalls a request; replicas that fail
+    or lag more than REPLICA_MAX_LAG_SECONDS are skipped and, with none
+    left, reads go to the primary.
+
+    After a request commits a write, the same identity reads from the
+    primary for READ_YOUR_WRITES_SECONDS. That is remembered in-process per identity
+    and in the ``primary_until`` cookie, so browser clients keep the
+    guarantee when the next request lands on another worker process.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.max_lag = 5.0
+        self.health_interval = 10.0
+        self.read_your_writes = 15.0
+        self._health = {}
+        self._checking = threading.Lock()
+        self._last_writes = {}
+        self._writes_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Register the replica binds and request hooks; call before ``db.init_app``."""
+        uris = [uri.strip() for uri in (app.config.get('SQLALCHEMY_REPLICA_URIS') or '').split(',') if uri.strip()]
+        if not uris:
+            return
+        self.keys = [f'replica_{index}' for index in range(len(uris))]
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        timeout = app.config.get('REPLICA_CONNECT_TIMEOUT')
+        for key, uri in zip(self.keys, uris):
+            if timeout and make_url(uri).get_backend_name() == 'postgresql':
+                binds[key] = {'url': uri, 'connect_args': {'connect_timeout': timeout}}
+            else:
+                binds[key] = uri
+        app.config['SQLALCHEMY_BINDS'] = binds
+        self.max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', self.max_lag)
+        self.health_interval = app.config.get('REPLICA_HEALTH_INTERVAL', self.health_interval)
+        self.read_your_writes = app.config.get('READ_YOUR_WRITES_SECONDS') or self.max_lag + self.health_interval
+
+        app.before_request(self._route_request)
+        app.after_request(self._remember_write)
+        if not event.contains(RoutingSession, 'after_flush', _note_write):
+            event.listen(RoutingSession, 'after_flush', _note_write)
+            event.listen(RoutingSession, 'do_orm_execute', _note_dml)
+            event.listen(RoutingSession, 'after_commit', _committed)
+            event.listen(RoutingSession, 'after_rollback', _rolled_back)
+
+    def _identity(self):
+        # Only used to pick primary vs replica, so an unverified read of the
+        # subject is enough; a forged token can at worst force the primary.
+        auth = request.headers.get('Authorization', '')
+        if not auth.startswith('Bearer '):
+            return None
+        try:
+            return str(jwt.decode(auth[7:], options={"verify_signature": False}).get('sub'))
+        except jwt.PyJWTError:
+            return None
+
+    def _recent_writer(self, identity):
+        now = time.time()
+        try:
+            if float(request.cookies.get(READ_AFTER_WRITE_COOKIE, 0)) > now:
+                return True
+        except ValueError:
+            pass
+        if identity is None:
+            return False
+        with self._writes_lock:
+            return self._last_writes.get(identity, 0) > now
+
+    def _route_request(self):
+        g.replica_reads = request.method in SAFE_METHODS and not self._recent_writer(self._identity())
+
+    def _remember_write(self, response):
+        # Logins, refreshes and failed writes commit nothing and stay unpinned.
+        if not g.get('committed_write'):
+            return response
+        until = time.time() + self.read_your_writes
+        identity = self._identity()
+        if identity is not None:
+            with self._writes_lock:
+                self._last_writes[identity] = until
+                if len(self._last_writes) > 10000:
+                    now = time.time()
+                    self._last_writes = {key: value for key, value in self._last_writes.items() if value > now}
+        response.set_cookie(READ_AFTER_WRITE_COOKIE, str(int(until) + 1), max_age=int(self.read_your_writes) + 1,
+                            httponly=True, samesite='Lax')
+        return response
+
+    def _check(self, key, engine, logger):
+        try:
+            with engine.connect() as conn:
+                if conn.dialect.name == 'postgresql':
+                    lag = float(conn.execute(PG_REPLICA_LAG_SQL).scalar() or 0)
+                else:
+                    conn.execute(text('SELECT 1'))
+                    lag = 0.0
+            self._health[key] = (lag <= self.max_lag, lag, time.time(), None)
+        except Exception as e:
+            logger.warning("Replica %s health check failed: %s", key, e)
+            self._health[key] = (False, None, time.time(), str(e))
+
+    def _refresh(self, engines):
+        now = time.time()
+        stale = [key for key in self.keys if now - self._health.get(key, (0, 0, 0, 0))[2] >= self.health_interval]
+        # One thread re-checks; requests keep using the last result.
+        if stale and self._checking.acquire(blocking=False):
+            threading.Thread(
+                target=self._check_all, args=(stale, engines, current_app.logger),
+                name='replica-health-check', daemon=True
+            ).start()
+
+    def _check_all(self, keys, engines, logger):
+        try:
+            for key in keys:
+                self._check(key, engines[key], logger)
+        finally:
+            self._checking.release()
+
+    def engine_for_read(self, engines):
+        """The replica engine for this request, or None to use the primary."""
+        if 'replica_key' not in g:
+            self._refresh(engines)
+            healthy = [key for key in self.keys if self._health.get(key, (False,))[0]]
+            g.replica_key = random.choice(healthy) if healthy else None
+        return engines[g.replica_key] if g.replica_key else None
+
+    def stats(self):
+        return {
+            "max_lag_seconds": self.max_lag,
+            "health_interval": self.health_interval,
+            "read_your_writes_seconds": self.read_your_writes,
+            "replicas": {
+                key: {
+                    "healthy": state[0],
+                    "lag_seconds": state[1],
+                    "checked_at": state[2],
+                    "error": state[3]
+                } if state else None
+                for key, state in ((key, self._health.get(key)) for key in self.keys)
+            }
+        }
+
+
+replica_router = ReplicaRouter()
+
+
+def _primary_only(mapper, clause):
+    if mapper is not None and getattr(inspect(mapper).local_table, 'name', None) in PRIMARY_ONLY_TABLES:
+        return True
+    if clause is not None:
+        if getattr(clause, '_for_update_arg', None) is not None:
+            return True
+        return any(getattr(table, 'name', None) in PRIMARY_ONLY_TABLES for table in find_tables(clause))
+    return False
+
+
+def _note_tables(session, names):
+    # Tables that are only ever read from the primary need no pinning, so
+    # issuing tokens into token_blacklist at login does not count.
+    if any(name not in PRIMARY_ONLY_TABLES for name in names):
+        session.info['wrote'] = True
+
+
+def _note_write(session, flush_context):
+    _note_tables(session, (inspect(obj).mapper.local_table.name
+                           for obj in (*session.new, *session.dirty, *session.deleted)))
+
+
+def _note_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _note_tables(orm_execute_state.session, [getattr(orm_execute_state.statement.table, 'name', None)])
+
+
+def _committed(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        g.committed_write = True
+
+
+def _rolled_back(session):
+    session.info.pop('wrote', None)
+
+
+class RoutingSession(Session):
+    """Session that reads from a replica during safe requests.
+
+    Flushes and DML statements always use the primary, and once a
+    session has written, the rest of its reads do too.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and replica_router.keys and has_request_context() and g.get('replica_reads'):
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['primary_only'] = True
+            elif not self.info.get('primary_only') and not _primary_only(mapper, clause):
+                engine = replica_router.engine_for_read(self._db.engines)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,113 @@
+from datetime import datetime
+from sqlalchemy import select, func, case, and_, literal
+from .schema.models import (
+    db, Timesheet, TimesheetEntry, TimesheetStatus, Task, Project, Client, User, UtilizationRollup
+)
+from .sql import upsert_insert, month_start
+
+
+def billable_condition():
+    """Time counts as billable when both the task and its project are billable."""
+    return and_(Task.billable.is_(True), func.coalesce(Project.default_billable, True).is_(True))
+
+
+def rollup_timesheets(timesheet_ids, sign=1):
+    """Add (``sign=1``) or remove (``sign=-1``) sheets' entries from the rollups.
+
+    Runs as one INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO UPDATE in
+    the caller's transaction, so rollups change atomically with the
+    status transition that triggered them. Does not commit.
+    """
+    if not timesheet_ids:
+        return
+    billable = billable_condition()
+    minutes = func.sum(TimesheetEntry.minutes) * sign
+    amount = func.sum(
+        case((billable, TimesheetEntry.minutes * Project.employee_rate / 60.0), else_=0)
+    ) * sign
+    month = month_start(TimesheetEntry.work_date)
+
+    rows = (
+        select(
+            User.company_id, Timesheet.user_id, Project.client_id, Project.id,
+            Timesheet.week_start, month, billable, minutes, amount,
+            literal(datetime.utcnow(), UtilizationRollup.updated_at.type)
+        )
+        .select_from(TimesheetEntry)
+        .join(Timesheet, Timesheet.id == TimesheetEntry.timesheet_id)
+        .join(User, User.id == Timesheet.user_id)
+        .join(Task, Task.id == TimesheetEntry.task_id)
+        .join(Project, Project.id == Task.project_id)
+        .where(Timesheet.id.in_(timesheet_ids))
+        .group_by(
+            User.company_id, Timesheet.user_id, Project.client_id, Project.id,
+            Timesheet.week_start, month, billable
+        )
+    )
+    stmt = upsert_insert(UtilizationRollup).from_select(
+        ['company_id', 'user_id', 'client_id', 'project_id', 'week_start', 'month_start',
+         'billable', 'minutes', 'billable_amount', 'updated_at'],
+        rows
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['company_id', 'user_id', 'project_id', 'week_start', 'month_start', 'billable'],
+        set_={
+            "minutes": UtilizationRollup.minutes + stmt.excluded.minutes,
+            "billable_amount": UtilizationRollup.billable_amount + stmt.excluded.billable_amount,
+            "updated_at": stmt.excluded.updated_at
+        }
+    )
+    db.session.execute(stmt)
+
+
+REPORT_GROUPS = {
+    'user': UtilizationRollup.user_id,
+    'project': UtilizationRollup.project_id,
+    'client': UtilizationRollup.client_id,
+}
+REPORT_PERIODS = {
+    'week': UtilizationRollup.week_start,
+    'month': UtilizationRollup.month_start,
+}
+
+
+def utilization_report(company_id, group_by, granularity, date_from, date_to):
+    """Aggregate the rollups for one company; cost scales with rows returned."""
+    group = REPORT_GROUPS[group_by]
+    period = REPORT_PERIODS[granularity]
+    billable_minutes = func.sum(case((UtilizationRollup.billable.is_(True), UtilizationRollup.minutes), else_=0))
+    rows = db.session.execute(
+        select(
+            group.label('key'), period.label('period'),
+            func.sum(UtilizationRollup.minutes).label('minutes'),
+            billable_minutes.label('billable_minutes'),
+            func.sum(UtilizationRollup.billable_amount).label('billable_amount')
+        )
+        .where(UtilizationRollup.company_id == company_id, period >= date_from, period <= date_to)
+        .group_by(group, period)
+        .order_by(period, group)
+    ).all()
+    return [{
+        f"{group_by}_id": row.key,
+        "period_start": row.period.isoformat() if hasattr(row.period, 'isoformat') else row.period,
+        "minutes": int(row.minutes or 0),
+        "hours": round((row.minutes or 0) / 60, 2),
+        "billable_minutes": int(row.billable_minutes or 0),
+        "billable_amount": round(float(row.billable_amount or 0), 2)
+    } for row in rows]
+
+
+def rebuild_rollups(company_id=None):
+    """Recompute the rollups from all approved timesheets. Does not commit."""
+    delete = UtilizationRollup.__table__.delete()
+    approved = select(Timesheet.id).join(User, User.id == Timesheet.user_id).where(
+        Timesheet.status == TimesheetStatus.APPROVED
+    )
+    if company_id is not None:
+        delete = delete.where(UtilizationRollup.company_id == company_id)
+        approved = approved.where(User.company_id == company_id)
+    db.session.execute(delete)
+    timesheet_ids = list(db.session.execute(approved).scalars())
+    for start in range(0, len(timesheet_ids), 1000):
+        rollup_timesheets(timesheet_ids[start:start + 1000])
+    return len(timesheet_ids)
@@ -2,7 +2,8 @@ from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from enum import Enum as PyEnum
 from sqlalchemy import Enum as SQLAlchemyEnum
-db = SQLAlchemy()
+from ..replicas import RoutingSession
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # USER_ROLES = ('admin', 'manager', 'employee', 'contractor')
 # # PROJECT_STATUSES = ('planned', 'active', 'completed')
@@ -41,11 +42,15 @@ class Company(db.Model):
     name = db.Column(db.String(100), nullable=False)
     industry = db.Column(db.String(50))
     email_domain = db.Column(db.String(50), unique=True, nullable=False)
-    contact_email = db.Column(db.String(100), nullable=False)
+    contact_email = db.Column(db.String(100), nullable=False, index=True)
     contact_number = db.Column(db.String(20))
     address = db.Column(db.Text)
     password = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped on every ORM update; a write based on an older version fails.
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version_id}
 
 
 class User(db.Model):
@@ -60,45 +65,69 @@ class User(db.Model):
     password = db.Column(db.String(255))
     role = db.Column(SQLAlchemyEnum(UserRole), nullable=False) 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
     #status = db.Column(db.String(20), nullable=False, default='active')  
     company = db.relationship('Company', backref='users')
 
+    __mapper_args__ = {'version_id_col': version_id}
+
+    __table_args__ = (
+        # Covers the login lookup so it can be answered from the index alone.
+        db.Index(
+            'ix_users1_email_login', 'email',
+            postgresql_include=['id', 'password', 'company_id', 'role', 'first_name', 'last_name']
+        ),
+        db.Index('ix_users1_company_id_id', 'company_id', 'id'),
+    )
+
 
 class Client(db.Model):
     __tablename__ = 'clients1'
 
     id = db.Column(db.Integer, primary_key=True)
-    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     code = db.Column(db.String(50), unique=True, nullable=False)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
 
     company = db.relationship('Company', backref=db.backref('clients', lazy=True))
 
+    __mapper_args__ = {'version_id_col': version_id}
+
 
 class Project(db.Model):
     __tablename__ = 'projects'
 
     id = db.Column(db.Integer, primary_key=True)
-    client_id = db.Column(db.Integer, db.ForeignKey('clients1.id'), nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey('clients1.id'), nullable=False, index=True)
+    # Copy of clients1.company_id for join-free tenant checks; NULL until backfilled.
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), index=True)
     name = db.Column(db.String(100), nullable=False)
     code = db.Column(db.String(50), unique=True, nullable=False)
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=False)
     default_billable = db.Column(db.Boolean, default=True)
     employee_rate = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(20), nullable=False, default='planned')  
+    status = db.Column(
+        db.Enum(ProjectStatus, native_enum=False, length=20, values_callable=lambda e: [m.value for m in e]),
+        nullable=False, default=ProjectStatus.PLANNED
+    )
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
 
     client = db.relationship('Client', backref='projects', lazy=True)
 
+    __mapper_args__ = {'version_id_col': version_id}
+
 
 class Task(db.Model):
     __tablename__ = 'tasks'
 
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False, index=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), index=True)
     name = db.Column(db.String(100), nullable=False)
     code = db.Column(db.String(50), unique=True, nullable=False)
     billable = db.Column(db.Boolean, default=True, nullable=False)
@@ -106,17 +135,24 @@ class Task(db.Model):
     end_date = db.Column(db.Date, nullable=False)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
 
     project = db.relationship('Project', backref='tasks')
 
+    __mapper_args__ = {'version_id_col': version_id}
+
 
 class Timesheet(db.Model):
     __tablename__ = 'timesheets'
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users1.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), index=True)
     week_start = db.Column(db.Date, nullable=False)
-    status = db.Column(db.String(20), nullable=False, default='draft')  
+    status = db.Column(
+        db.Enum(TimesheetStatus, native_enum=False, length=20, values_callable=lambda e: [m.value for m in e]),
+        nullable=False, default=TimesheetStatus.DRAFT
+    )
     submitted_at = db.Column(db.DateTime)
     approved_at = db.Column(db.DateTime)
     rejected_at = db.Column(db.DateTime)
@@ -127,11 +163,67 @@ class Timesheet(db.Model):
 
     user = db.relationship('User', backref='timesheets')
 
+    __table_args__ = (
+        db.Index('uq_timesheets_user_week', 'user_id', 'week_start', unique=True),
+    )
+
+
+class TimesheetEntry(db.Model):
+    __tablename__ = 'timesheet_entries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    timesheet_id = db.Column(db.Integer, db.ForeignKey('timesheets.id', ondelete='CASCADE'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
+    work_date = db.Column(db.Date, nullable=False)
+    minutes = db.Column(db.SmallInteger, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    timesheet = db.relationship('Timesheet', backref=db.backref('entries', passive_deletes=True))
+    task = db.relationship('Task')
+
+    __table_args__ = (
+        db.UniqueConstraint('timesheet_id', 'task_id', 'work_date', name='uq_timesheet_entries_sheet_task_day'),
+        db.CheckConstraint('minutes >= 0 AND minutes <= 1440', name='ck_timesheet_entries_minutes'),
+        db.Index('ix_timesheet_entries_task_id', 'task_id'),
+    )
+
+class UtilizationRollup(db.Model):
+    """Approved minutes and billable value per user, project and week.
+
+    Rows are split by calendar month as well, so a week that straddles two
+    months has one row per month and both week and month totals can be
+    read without touching timesheet_entries.
+    """
+    __tablename__ = 'utilization_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users1.id', ondelete='CASCADE'), nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey('clients1.id', ondelete='CASCADE'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    week_start = db.Column(db.Date, nullable=False)
+    month_start = db.Column(db.Date, nullable=False)
+    billable = db.Column(db.Boolean, nullable=False)
+    minutes = db.Column(db.Integer, nullable=False, default=0)
+    billable_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            'company_id', 'user_id', 'project_id', 'week_start', 'month_start', 'billable',
+            name='uq_utilization_rollups_key'
+        ),
+        db.Index('ix_utilization_rollups_company_week', 'company_id', 'week_start'),
+        db.Index('ix_utilization_rollups_company_month', 'company_id', 'month_start'),
+    )
+
+
 class Role(db.Model):
     __tablename__ = 'roles'
 
     id = db.Column(db.Integer, primary_key=True)
-    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
     name = db.Column(db.String(50), nullable=False)
     description = db.Column(db.Text, nullable=True)
     permissions = db.Column(db.Text, nullable=True)  
@@ -167,3 +259,7 @@ class TokenBlacklist(db.Model):
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
+
+    __table_args__ = (
+        db.Index('ix_token_blacklist_user_identity_created_at', 'user_identity', 'created_at'),
+    )
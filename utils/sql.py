@@ -0,0 +1,37 @@
+from sqlalchemy import Date, cast, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from .schema.models import db
+
+# Dialects whose INSERT has the ``on_conflict_do_*`` API the upserts use.
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def check_database_uri(uri):
+    """Fail at startup, not on the first upsert, when the database has no ON CONFLICT support."""
+    if not uri:
+        return
+    backend = make_url(uri).get_backend_name()
+    if backend not in UPSERT_INSERTS:
+        raise ValueError(
+            f"SQLALCHEMY_DATABASE_URI uses {backend}; only {', '.join(UPSERT_INSERTS)} are supported"
+        )
+
+
+def upsert_insert(model):
+    """INSERT construct with ``on_conflict_do_*`` for the bound database.
+
+    PostgreSQL in production, SQLite for local runs; both share the same
+    ON CONFLICT API. Other databases are refused by ``check_database_uri``.
+    """
+    return UPSERT_INSERTS[db.session.get_bind().dialect.name](model)
+
+
+def month_start(column):
+    """First day of the month of a date column, as a date."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.date(column, 'start of month')
+    return cast(func.date_trunc('month', column), Date)
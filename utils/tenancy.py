@@ -0,0 +1,184 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, has_request_context, has_app_context, current_app
+from sqlalchemy import event, select, update, func, or_, and_
+from sqlalchemy.orm import with_loader_criteria
+from .replicas import RoutingSession
+from .schema.models import (
+    db, User, Client, Project, Task, Timesheet, TimesheetEntry, Role, UtilizationRollup
+)
+
+# Execution option that lets a statement see every tenant's rows.
+SKIP_TENANT_SCOPE = 'skip_tenant_scope'
+
+_tenant_override = ContextVar('tenant_override', default=None)
+
+
+def current_company_id():
+    """The tenant for ORM queries: an explicit ``tenant_scope`` or the verified JWT's company_id."""
+    override = _tenant_override.get()
+    if override is not None:
+        return override
+    if has_request_context():
+        # Set by flask_jwt_extended only once the token has been verified.
+        claims = g.get('_jwt_extended_jwt')
+        if claims:
+            return claims.get('company_id')
+    return None
+
+
+@contextmanager
+def tenant_scope(company_id):
+    """Scope ORM queries to ``company_id`` outside a request, e.g. in CLI commands."""
+    token = _tenant_override.set(company_id)
+    try:
+        yield
+    finally:
+        _tenant_override.reset(token)
+
+
+def _fallback():
+    # Until `flask tenants backfill-company-id` has run, rows may still have
+    # a NULL company_id and are matched through their parents instead.
+    return current_app.config.get('TENANT_COMPANY_ID_FALLBACK', True) if has_app_context() else True
+
+
+def _parent_scope(model, company_id):
+    if model is Project:
+        return Project.client_id.in_(select(Client.id).where(Client.company_id == company_id))
+    if model is Task:
+        return Task.project_id.in_(
+            select(Project.id).join(Client, Client.id == Project.client_id).where(Client.company_id == company_id)
+        )
+    return Timesheet.user_id.in_(select(User.id).where(User.company_id == company_id))
+
+
+def company_filter(model, company_id):
+    """WHERE clause matching a Project, Task or Timesheet row to a company."""
+    if not _fallback():
+        return model.company_id == company_id
+    return or_(model.company_id == company_id,
+               and_(model.company_id.is_(None), _parent_scope(model, company_id)))
+
+
+def _tenant_criteria(company_id):
+    criteria = [
+        with_loader_criteria(User, lambda cls: cls.company_id == company_id, include_aliases=True),
+        with_loader_criteria(Client, lambda cls: cls.company_id == company_id, include_aliases=True),
+        with_loader_criteria(Role, lambda cls: cls.company_id == company_id, include_aliases=True),
+        with_loader_criteria(UtilizationRollup, lambda cls: cls.company_id == company_id, include_aliases=True),
+    ]
+    if not _fallback():
+        return criteria + [
+            with_loader_criteria(Project, lambda cls: cls.company_id == company_id, include_aliases=True),
+            with_loader_criteria(Task, lambda cls: cls.company_id == company_id, include_aliases=True),
+            with_loader_criteria(Timesheet, lambda cls: cls.company_id == company_id, include_aliases=True),
+            with_loader_criteria(
+                TimesheetEntry,
+                lambda cls: cls.timesheet_id.in_(select(Timesheet.id).where(Timesheet.company_id == company_id)),
+                include_aliases=True
+            ),
+        ]
+    return criteria + [
+        with_loader_criteria(
+            Project,
+            lambda cls: or_(cls.company_id == company_id, and_(
+                cls.company_id.is_(None),
+                cls.client_id.in_(select(Client.id).where(Client.company_id == company_id))
+            )),
+            include_aliases=True
+        ),
+        with_loader_criteria(
+            Task,
+            lambda cls: or_(cls.company_id == company_id, and_(
+                cls.company_id.is_(None),
+                cls.project_id.in_(
+                    select(Project.id).join(Client, Client.id == Project.client_id)
+                    .where(Client.company_id == company_id)
+                )
+            )),
+            include_aliases=True
+        ),
+        with_loader_criteria(
+            Timesheet,
+            lambda cls: or_(cls.company_id == company_id, and_(
+                cls.company_id.is_(None),
+                cls.user_id.in_(select(User.id).where(User.company_id == company_id))
+            )),
+            include_aliases=True
+        ),
+        with_loader_criteria(
+            TimesheetEntry,
+            lambda cls: cls.timesheet_id.in_(
+                select(Timesheet.id).join(User, User.id == Timesheet.user_id)
+                .where(User.company_id == company_id)
+            ),
+            include_aliases=True
+        ),
+    ]
+
+
+def backfill_company_ids(batch_size=5000, pause=0.0, echo=None):
+    """Fill NULL company_id on projects, tasks and timesheets in id-range batches.
+
+    Each batch is its own short transaction, so the tables stay writable
+    while it runs; re-running only touches rows that are still NULL.
+    Returns the rows updated per table.
+    """
+    statements = (
+        ('projects', Project, select(Client.company_id).where(Client.id == Project.client_id)),
+        ('tasks', Task, select(Client.company_id).join(Project, Project.client_id == Client.id)
+            .where(Project.id == Task.project_id)),
+        ('timesheets', Timesheet, select(User.company_id).where(User.id == Timesheet.user_id)),
+    )
+    updated = {}
+    for name, model, source in statements:
+        updated[name] = 0
+        low, high = db.session.execute(
+            select(func.min(model.id), func.max(model.id)).where(model.company_id.is_(None))
+            .execution_options(**{SKIP_TENANT_SCOPE: True})
+        ).one()
+        db.session.commit()
+        if low is None:
+            continue
+        for start in range(low, high + 1, batch_size):
+            result = db.session.execute(
+                update(model)
+                .where(model.id >= start, model.id < start + batch_size, model.company_id.is_(None))
+                .values(company_id=source.scalar_subquery())
+                .execution_options(synchronize_session=False, **{SKIP_TENANT_SCOPE: True})
+            )
+            db.session.commit()
+            updated[name] += result.rowcount
+            if echo:
+                echo(f"{name}: ids {start}-{start + batch_size - 1}, {result.rowcount} updated")
+            if pause:
+                time.sleep(pause)
+    return updated
+
+
+def _apply_tenant_scope(state):
+    if not (state.is_select or state.is_update or state.is_delete) or state.is_column_load:
+        return
+    if state.execution_options.get(SKIP_TENANT_SCOPE, False):
+        return
+    company_id = current_company_id()
+    if company_id is None:
+        return
+    state.statement = state.statement.options(*_tenant_criteria(company_id))
+
+
+def init_app(app):
+    """Filter every ORM SELECT, UPDATE and DELETE on tenant tables by company.
+
+    Within an authenticated request the tenant is the token's company_id,
+    so a handler that forgets its own filter still only sees its company's
+    rows. Projects, tasks and timesheets are matched on their own
+    company_id column (plus the parent join for rows not yet backfilled
+    while TENANT_COMPANY_ID_FALLBACK is on). Core statements run through
+    ``connection.execute`` and statements carrying
+    ``skip_tenant_scope=True`` are left alone.
+    """
+    if not event.contains(RoutingSession, 'do_orm_execute', _apply_tenant_scope):
+        event.listen(RoutingSession, 'do_orm_execute', _apply_tenant_scope)
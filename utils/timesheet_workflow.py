@@ -0,0 +1,123 @@
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+from .schema.models import db, Timesheet, TimesheetStatus
+from .reporting import rollup_timesheets
+from .tenancy import company_filter
+
+# action -> (allowed source statuses, target status, timestamp column)
+TRANSITIONS = {
+    'submit': (
+        (TimesheetStatus.DRAFT, TimesheetStatus.REJECTED, TimesheetStatus.RECALLED),
+        TimesheetStatus.SUBMITTED, 'submitted_at'
+    ),
+    'approve': ((TimesheetStatus.SUBMITTED,), TimesheetStatus.APPROVED, 'approved_at'),
+    'reject': ((TimesheetStatus.SUBMITTED,), TimesheetStatus.REJECTED, 'rejected_at'),
+    'recall': ((TimesheetStatus.SUBMITTED,), TimesheetStatus.RECALLED, 'recalled_at'),
+}
+
+MANAGER_ACTIONS = ('approve', 'reject')
+MANAGER_ROLES = ('ADMIN', 'MANAGER')
+MAX_BULK_IDS = 1000
+
+
+def is_manager(claims):
+    return str(claims.get('role', '')).upper() in MANAGER_ROLES
+
+
+def transition_timesheets(action, timesheet_ids, company_id, actor_id=None, manager=False, reason=None):
+    """Move timesheets to the action's target status with one conditional UPDATE.
+
+    Only sheets of ``company_id`` that are currently in an allowed source
+    status change; non-managers may only submit or recall their own sheets
+    (``actor_id``). Returns ``(transitioned_ids, skipped)`` where
+    ``skipped`` explains every requested id that did not change.
+    """
+    sources, target, stamp = TRANSITIONS[action]
+    ids = list(dict.fromkeys(timesheet_ids))
+    in_company = company_filter(Timesheet, company_id)
+    now = datetime.utcnow()
+
+    values = {"status": target, stamp: now, "updated_at": now}
+    if action == 'reject':
+        values["rejection_reason"] = reason
+
+    stmt = (
+        update(Timesheet)
+        .where(
+            Timesheet.id.in_(ids),
+            Timesheet.status.in_(sources),
+            in_company
+        )
+        .values(**values)
+        .returning(Timesheet.id)
+        .execution_options(synchronize_session=False)
+    )
+    if not manager:
+        stmt = stmt.where(Timesheet.user_id == actor_id)
+
+    transitioned = set(db.session.execute(stmt).scalars())
+    if target == TimesheetStatus.APPROVED:
+        # Same transaction as the UPDATE: rollups never count a sheet whose
+        # approval rolled back.
+        rollup_timesheets(list(transitioned))
+
+    skipped = []
+    remaining = [timesheet_id for timesheet_id in ids if timesheet_id not in transitioned]
+    if remaining:
+        current = dict(db.session.execute(
+            select(Timesheet.id, Timesheet.status)
+            .where(Timesheet.id.in_(remaining), in_company)
+        ).all())
+        for timesheet_id in remaining:
+            if timesheet_id not in current:
+                skipped.append({"id": timesheet_id, "reason": "not found"})
+            elif current[timesheet_id] in sources:
+                skipped.append({"id": timesheet_id, "reason": "not your timesheet"})
+            else:
+                skipped.append({"id": timesheet_id, "reason": f"status is {current[timesheet_id].value}"})
+
+    return [timesheet_id for timesheet_id in ids if timesheet_id in transitioned], skipped
+
+
+def apply_transition(action, timesheet_ids, claims, reason=None):
+    """Validate the request, run the transition and build the response."""
+    if action not in TRANSITIONS:
+        return {"error": f"Unknown action '{action}'", "actions": sorted(TRANSITIONS)}, 404
+
+    company_id = claims.get('company_id')
+    if not company_id:
+        return {"error": "Company ID not found in token"}, 400
+
+    manager = is_manager(claims)
+    if action in MANAGER_ACTIONS and not manager:
+        return {"error": "Manager or admin role required"}, 403
+
+    if not isinstance(timesheet_ids, list) or not timesheet_ids \
+            or not all(isinstance(timesheet_id, int) for timesheet_id in timesheet_ids):
+        return {"error": "ids must be a non-empty list of integers"}, 400
+    if len(timesheet_ids) > MAX_BULK_IDS:
+        return {"error": f"At most {MAX_BULK_IDS} ids per request"}, 413
+
+    actor_id = claims.get('sub')
+    try:
+        actor_id = int(actor_id)
+    except (TypeError, ValueError):
+        actor_id = None
+
+    try:
+        transitioned, skipped = transition_timesheets(
+            action, timesheet_ids, company_id, actor_id=actor_id, manager=manager, reason=reason
+        )
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return {"error": f"Database error: {str(e)}"}, 500
+
+    return {
+        "action": action,
+        "status": TRANSITIONS[action][1].value,
+        "transitioned_count": len(transitioned),
+        "transitioned": transitioned,
+        "skipped": skipped
+    }, 200